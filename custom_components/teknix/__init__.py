@@ -1,44 +1,137 @@
 from __future__ import annotations
+import asyncio
 import logging
 import time
-from datetime import timedelta
+from collections.abc import Callable, Iterable, Mapping
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import config_validation as cv, device_registry as dr
 from homeassistant.components import mqtt
-from homeassistant.helpers.dispatcher import async_dispatcher_send
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers.storage import Store
 
 from .const import (
-    DOMAIN, PLATFORMS, CONF_SERIAL, CONF_MODEL,
-    DISPATCH_SIGNAL, model_max_step, cmd_topic, tele_topic, model_total_kw, model_element_kw,
+    DOMAIN, PLATFORMS, CONF_SERIAL, CONF_MODEL, CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY_SECONDS, VOLATILE_STATE_KEYS,
+    CONF_LIMIT_SENSOR, CONF_LIMIT_POWER, CONF_LIMIT_HYSTERESIS, DEFAULT_LIMIT_HYSTERESIS_KW,
+    CONF_BUDGET_PRIORITY, DEFAULT_BUDGET_PRIORITY,
+    AVAILABLE_KEY, DERIVED_KEYS, dispatch_signal, model_max_step, cmd_topic, TELE_RESULT, TELE_LWT, model_element_kw,
     INFO_COMMAND_INTERVAL_MINUTES, PO1800NG_COMMAND_INTERVAL_MINUTES,
+    COMMAND_MIN_INTERVAL_SECONDS, COMMAND_CONFIRM_TIMEOUT_SECONDS, COMMAND_MAX_ATTEMPTS,
+    OFFLINE_FRAME_AGE_SECONDS, OFFLINE_BUFFER_SIZE,
+    ENERGY_MAX_GAP_SECONDS, ENERGY_PRECISION, FRAME_HISTORY_SIZE, FRAME_HISTORY_ROW_BYTES, PENDING_TTL_SECONDS, POLL_MAX_INTERVAL_MINUTES, POLL_BOOST_INTERVAL_SECONDS, POLL_BOOST_DURATION_SECONDS,
 )
-from .parser import parse_info_message
-from .commands import build_info_command
+from .fields import OPTIONAL_FIELD_KEYS, FrameLayout, find_layout
+from .parser import (
+    REJECT_NON_FRAME, REJECT_TOO_SHORT, REJECT_UNKNOWN_LAYOUT,
+    FrameError, InfoFrameDecoder, extract_frame, layout_decoder,
+)
+from .allocator import async_get_allocator
+from .commands import build_info_command, build_profile_commands
+from .command_queue import CommandQueue, TeknixCommandHeld
+from .energy import EnergyMeter, compute_power_kw
+from .history import FrameHistory
+from .limiter import PowerLimiter
+from .metrics import HubMetrics
+from .offline import OfflineBuffer
+from .pending import PendingOverrides
+from .polling import PollScheduler
+from .poll_wheel import async_get_poll_wheel
+from .router import async_get_router
+from .state import TeknixState
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 class TeknixHub:
-    def __init__(self, hass: HomeAssistant, serial: str, model: str, entry_id: str):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        serial: str,
+        model: str,
+        entry_id: str,
+        save_delay: float = DEFAULT_SAVE_DELAY_SECONDS,
+        limit_sensor: str | None = None,
+        limit_kw: float | None = None,
+        limit_hysteresis_kw: float = DEFAULT_LIMIT_HYSTERESIS_KW,
+        budget_priority: int = DEFAULT_BUDGET_PRIORITY,
+    ):
         self.hass = hass
         self.serial = serial
         self.model = model
         self.entry_id = entry_id
         self.firmware = None
         self.step_max = model_max_step(model)
-        self.state: dict = {}
+        self.state = TeknixState()
+        self.history = FrameHistory(FRAME_HISTORY_SIZE, FRAME_HISTORY_ROW_BYTES)
+        # frame layout, detected from the first valid frame; its decoder also
+        # converts the optional INFO fields whose sensors are enabled
+        self.layout: FrameLayout | None = None
+        self._decoder: InfoFrameDecoder | None = None
+        self._layout_warned = False
+        # last decoded frame, to short-circuit identical repeats (see _mqtt_message_received)
+        self._last_frame: bytes | None = None
+        self._last_parsed: dict = {}
+        self._last_power_kw = 0.0
+        self._energy = EnergyMeter(max_gap=ENERGY_MAX_GAP_SECONDS)
+        self.metrics = HubMetrics()
         self.device_id: str | None = None
-        self._unsub_mqtt = None
-        self._unsub_info_timer = None
-        self._unsub_po1800ng_timer = None
+        # Tasmota LWT: True/False once the first Online/Offline message arrives
+        self.online: bool | None = None
+        # False while commands cannot reach the heater: LWT Offline, broker
+        # disconnected or no frame for OFFLINE_FRAME_AGE_SECONDS (see _async_update_available)
+        self.available = True
+        self._mqtt_connected = True
+        self._last_frame_at = 0.0
+        self._unsub_mqtt_status = None
+        # control requests made while unavailable, replayed after the first frame back
+        self._offline = OfflineBuffer(OFFLINE_BUFFER_SIZE)
+        self._router = async_get_router(hass)
+        self._commands = CommandQueue(
+            hass,
+            self.async_send_command,
+            COMMAND_MIN_INTERVAL_SECONDS,
+            confirm_poll=build_info_command(),
+            confirm_timeout=COMMAND_CONFIRM_TIMEOUT_SECONDS,
+            max_attempts=COMMAND_MAX_ATTEMPTS,
+            on_failed=self._async_command_failed,
+            on_confirmed=self.metrics.command_confirmed,
+        )
+        self._unsub_poll_wheel = None
+        # share of the poll interval this hub's polls are offset by (see PollWheel)
+        self.poll_phase: float | None = None
+        self._info_poll = PollScheduler(
+            INFO_COMMAND_INTERVAL_MINUTES * 60,
+            POLL_MAX_INTERVAL_MINUTES * 60,
+            boost_interval=POLL_BOOST_INTERVAL_SECONDS,
+            boost_duration=POLL_BOOST_DURATION_SECONDS,
+        )
+        # INFO frames still answer for backoff, but do not stand in for PO1800NG itself
+        self._po1800ng_poll = PollScheduler(
+            PO1800NG_COMMAND_INTERVAL_MINUTES * 60,
+            POLL_MAX_INTERVAL_MINUTES * 60,
+            skip_fresh=False,
+        )
         
         self._store = Store(hass, 1, f"{DOMAIN}.{serial}")
+        self._save_delay = max(0.0, float(save_delay))
+        # True while persisted keys have changed since the last write
+        self._dirty = False
         
         # Pending overrides to suppress brief MQTT races after local writes
-        self._pending_until: dict[str, float] = {}
-        self._pending_values: dict[str, object] = {}
+        self._pending = PendingOverrides(hass, self._async_pending_released)
+
+        # Number of connected entity callbacks per state key
+        self._listeners: dict[str, int] = {}
+        # Entity state writes skipped because none of their keys changed
+        self.suppressed_writes = 0
+
+        # Optional site power limiter (options: limit_*)
+        self.limiter: PowerLimiter | None = None
+        if limit_sensor and limit_kw:
+            self.limiter = PowerLimiter(hass, self, limit_sensor, limit_kw, limit_hysteresis_kw)
+        self.budget_priority = int(budget_priority)
     
     @property
     def element_kw(self) -> float:
@@ -46,121 +139,518 @@ class TeknixHub:
 
     async def async_start(self) -> None:
         await self._async_restore_state()
-        
-        topic = tele_topic(self.serial)
-        _LOGGER.warning("TeknixHub subscribing to %s", topic)
-        self._unsub_mqtt = await mqtt.async_subscribe(
-            self.hass, topic, self._mqtt_message_received
+
+        # a heater that never answers is marked offline once the frame age runs out
+        self._last_frame_at = time.monotonic()
+        self._mqtt_connected = mqtt.is_connected(self.hass)
+        self._unsub_mqtt_status = mqtt.async_subscribe_connection_status(
+            self.hass, self._async_mqtt_connection_changed
         )
+        self._async_update_available()
         
-        # Start periodic INFO command sending every minute
-        self._unsub_info_timer = async_track_time_interval(
-            self.hass, self._send_info_command, timedelta(minutes=INFO_COMMAND_INTERVAL_MINUTES)
-        )
-        _LOGGER.info("Started periodic INFO command sending every minute")
+        # The shared router delivers only the tele leaves we consume, as raw bytes
+        await self._router.async_register(self.serial, {
+            TELE_RESULT: self._mqtt_message_received,
+            TELE_LWT: self._lwt_message_received,
+        })
         
-        # Start periodic PO1800NG command sending every 5 minutes
-        self._unsub_po1800ng_timer = async_track_time_interval(
-            self.hass, self._send_po1800ng_command, timedelta(minutes=PO1800NG_COMMAND_INTERVAL_MINUTES)
+        # The shared wheel ticks both INFO and PO1800NG polls; the schedulers decide what is due.
+        # It also paces the initial polls of all heaters at startup (see _async_poll_start).
+        self._unsub_poll_wheel = async_get_poll_wheel(self.hass).async_add(
+            self.serial, self._async_poll_tick, self._async_poll_start
+        )
+        _LOGGER.info(
+            "Started adaptive polling (INFO every %d min, PO1800NG every %d min)",
+            INFO_COMMAND_INTERVAL_MINUTES, PO1800NG_COMMAND_INTERVAL_MINUTES,
         )
-        _LOGGER.info("Started periodic PO1800NG command sending every %d minutes", PO1800NG_COMMAND_INTERVAL_MINUTES)
-        
-        # Send initial INFO command to get current state
-        self._send_info_command()
-        
-        # Send initial PO1800NG command
-        self._send_po1800ng_command()
+
+        # the shared budget only ever lowers the steps; it has nothing to do while none is set
+        await async_get_allocator(self.hass).async_add(self, self.budget_priority)
+
+        if self.limiter is not None:
+            self.limiter.async_start()
 
     async def async_stop(self) -> None:
-        if self._unsub_mqtt:
-            self._unsub_mqtt()
-            self._unsub_mqtt = None
+        self._router.async_unregister(self.serial)
+        if self._unsub_mqtt_status is not None:
+            self._unsub_mqtt_status()
+            self._unsub_mqtt_status = None
+        if self.limiter is not None:
+            self.limiter.async_stop()
+        async_get_allocator(self.hass).async_remove(self)
         
-        if self._unsub_info_timer:
-            self._unsub_info_timer()
-            self._unsub_info_timer = None
-            _LOGGER.info("Stopped periodic INFO command sending")
-        
-        if self._unsub_po1800ng_timer:
-            self._unsub_po1800ng_timer()
-            self._unsub_po1800ng_timer = None
-            _LOGGER.info("Stopped periodic PO1800NG command sending")
+        if self._unsub_poll_wheel:
+            self._unsub_poll_wheel()
+            self._unsub_poll_wheel = None
+            _LOGGER.info("Stopped periodic INFO/PO1800NG polling")
+
+        await self._commands.async_stop()
+        self._pending.async_stop()
+
+        if self._dirty:
+            await self._async_save_state()
 
     @callback
     def _mqtt_message_received(self, msg) -> None:
         """Handle incoming MQTT tele frame."""
-        payload = msg.payload
-        if isinstance(payload, (bytes, bytearray)):
-            try:
-                payload = payload.decode("utf-8", "ignore")
-            except Exception:
-                payload = str(payload)
-
-        parsed = parse_info_message(payload)
-        if not parsed:
+        metrics = self.metrics
+        metrics.frames_received += 1
+        timing = metrics.timing
+        if timing:
+            start = time.perf_counter()
+
+        frame = extract_frame(msg.payload)
+        if frame is None:
+            metrics.rejected(REJECT_NON_FRAME)
             return
 
-        # Merge parsed telemetry into state, but respect pending suppressions
         now = time.monotonic()
-        new_state = dict(self.state)
-
-        # Cleanup expired pending entries
-        expired_keys = [k for k, ts in self._pending_until.items() if ts <= now]
-        for k in expired_keys:
-            self._pending_until.pop(k, None)
-            self._pending_values.pop(k, None)
-
-        for key, value in parsed.items():
-            pending_ts = self._pending_until.get(key)
-            if pending_ts is not None and now < pending_ts:
-                pending_value = self._pending_values.get(key)
-                # If telemetry differs during the pending window, ignore it
-                if pending_value is not None and pending_value != value:
-                    continue
-                # If telemetry matches our pending value, accept and clear pending
-                if pending_value == value:
-                    self._pending_until.pop(key, None)
-                    self._pending_values.pop(key, None)
-            new_state[key] = value
+        if frame == self._last_frame:
+            # The heater often repeats its last answer; the bytes themselves are the
+            # fingerprint. Only the time-driven parts and open confirmations need it.
+            metrics.frames_duplicate += 1
+            self._last_frame_at = now
+            parsed = self._last_parsed
+            self.history.append(parsed["raw"], now)
+            self._info_poll.frame_received(now)
+            self._po1800ng_poll.frame_received(now)
+            energy = round(self._energy.update(self._last_power_kw, now), ENERGY_PRECISION)
+            parsed["energy_kwh"] = energy
+            if self._pending:
+                # the repeat may confirm (or keep masking) an optimistic value
+                self._async_merge_frame(parsed)
+            elif energy != self.state.energy_kwh:
+                self.async_update_state({"energy_kwh": energy})
+            self._commands.async_frame_received(parsed)
+            if not self.available:
+                self._async_update_available(now)
+            return
+
+        decoder = self._decoder
+        if decoder is None:
+            decoder = self._async_detect_layout(frame)
+            if decoder is None:
+                metrics.rejected(REJECT_UNKNOWN_LAYOUT)
+                return
+        try:
+            parsed = decoder.decode_frame(frame)
+        except FrameError as err:
+            metrics.rejected(err.reason)
+            if err.reason == REJECT_TOO_SHORT and find_layout(
+                self.model, frame.count(b"&") + 1
+            ) not in (None, self.layout):
+                # not a truncated frame but a shorter layout (new firmware?): detect it again
+                self._decoder = None
+            return
+        metrics.frames_parsed += 1
+        # only a frame that decodes proves the heater is there
+        self._last_frame_at = now
+        if timing:
+            metrics.parse.add(time.perf_counter() - start)
+
+        self.history.append(parsed["raw"], now)
+        self._info_poll.frame_received(now)
+        self._po1800ng_poll.frame_received(now)
+
+        # Energy is integrated from what the heater reports, not from optimistic state
+        power = compute_power_kw(parsed, self.step_max, self.element_kw)
+        parsed["energy_kwh"] = round(self._energy.update(power, now), ENERGY_PRECISION)
+
+        self._last_frame = frame
+        self._last_parsed = parsed
+        self._last_power_kw = power
+        self._async_merge_frame(parsed)
+        self._commands.async_frame_received(parsed)
+        if not self.available:
+            # back: state now holds what the heater reports, so the replay only sends what differs
+            self._async_update_available(now)
+
+    @callback
+    def _async_merge_frame(self, parsed: dict) -> None:
+        """Merge parsed telemetry into state, but respect pending suppressions."""
+        accepted = self._pending.async_filter(parsed)
+        if len(accepted) < len(parsed):
+            self.metrics.frames_suppressed += 1
+        self.async_update_state(accepted)
+
+    @callback
+    def _lwt_message_received(self, msg) -> None:
+        """Handle Tasmota LWT (Online/Offline)."""
+        online = bytes(msg.payload).strip().lower() == b"online"
+        if online != self.online:
+            _LOGGER.info("Teknix %s is %s", self.serial, "online" if online else "offline")
+        self.online = online
+        self._async_update_available()
+        if online and not self.available:
+            self._send_info_command()
+
+    @callback
+    def _async_mqtt_connection_changed(self, connected: bool) -> None:
+        self._mqtt_connected = connected
+        self._async_update_available()
+        if connected and not self.available:
+            self._send_info_command()
+
+    @callback
+    def _async_update_available(self, now: float | None = None) -> None:
+        """Re-evaluate whether commands can reach the heater; hold or replay them on a change."""
+        if now is None:
+            now = time.monotonic()
+        available = (
+            self._mqtt_connected
+            and self.online is not False
+            and now - self._last_frame_at < OFFLINE_FRAME_AGE_SECONDS
+        )
+        if available == self.available:
+            return
+        self.available = available
+        async_dispatcher_send(self.hass, dispatch_signal(self.entry_id, AVAILABLE_KEY))
+        if available:
+            _LOGGER.info("Teknix %s reports again", self.serial)
+            self._async_replay_commands()
+        else:
+            _LOGGER.warning("Teknix %s is unreachable, holding commands until it reports again", self.serial)
+            # only a frame received after this counts; reconnecting always waits for a fresh INFO
+            self._last_frame_at = float("-inf")
+            self._async_hold_commands()
+
+    @callback
+    def _async_hold_commands(self) -> None:
+        """Move unsent and unconfirmed commands to the offline buffer and undo their optimistic values."""
+        requests = self._commands.async_take_controls(self._held_error())
+        if not requests:
+            return
+        keys = {key for _, _, values in requests for key in values}
+        self._pending.async_discard(keys)
+        reported = self._last_parsed
+        self.async_update_state({k: reported[k] for k in keys if k in reported})
+        # compared with what the heater last reported, not with the optimistic values
+        self._offline.async_put(requests, reported)
+
+    @callback
+    def _async_replay_commands(self) -> None:
+        """Send the held requests that the heater does not report yet."""
+        if not self._offline:
+            return
+        requests = self._offline.async_take(self.state)
+        if requests:
+            _LOGGER.info("Teknix %s: replaying %d held command(s)", self.serial, len(requests))
+            self.async_request_batch(requests).add_done_callback(self._replay_done)
+
+    @staticmethod
+    def _replay_done(future: asyncio.Future) -> None:
+        # failures are already logged by _async_command_failed
+        if not future.cancelled():
+            future.exception()
+
+    @callback
+    def async_update_state(self, values: Mapping[str, object]) -> set[str]:
+        """Merge values into state and notify listeners of the keys that changed."""
+        metrics = self.metrics
+        timing = metrics.timing
+        if timing:
+            start = time.perf_counter()
+        self.state, changed = self.state.evolve(values)
+        if changed and not changed <= VOLATILE_STATE_KEYS:
+            self._async_schedule_save()
+        if timing:
+            merged = time.perf_counter()
+            metrics.merge.add(merged - start)
+        self._async_notify(changed)
+        if timing:
+            metrics.dispatch.add(time.perf_counter() - merged)
+        return changed
+
+    @callback
+    def async_subscribe(self, key: str, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Call update_callback whenever the given state key (or derived key) changes."""
+        unsub = async_dispatcher_connect(
+            self.hass, dispatch_signal(self.entry_id, key), update_callback
+        )
+        self._listeners[key] = self._listeners.get(key, 0) + 1
+        if key in OPTIONAL_FIELD_KEYS:
+            self._async_update_decoder()
+
+        @callback
+        def _unsubscribe() -> None:
+            unsub()
+            count = self._listeners.get(key, 0) - 1
+            if count > 0:
+                self._listeners[key] = count
+            else:
+                self._listeners.pop(key, None)
+                if key in OPTIONAL_FIELD_KEYS:
+                    self._async_update_decoder()
+
+        return _unsubscribe
+
+    @callback
+    def _async_detect_layout(self, frame: bytes) -> InfoFrameDecoder | None:
+        """Pick the frame layout from a frame's length and compile the hub's decoder for it."""
+        length = frame.count(b"&") + 1
+        layout = find_layout(self.model, length)
+        if layout is None:
+            if not self._layout_warned:
+                self._layout_warned = True
+                _LOGGER.warning(
+                    "Teknix %s: no known INFO frame layout for %s with %d values; frames are ignored",
+                    self.serial, self.model, length,
+                )
+            return None
+
+        if layout is not self.layout:
+            _LOGGER.info("Teknix %s: INFO frames use layout %s (%d values)", self.serial, layout.name, length)
+        self.layout = layout
+        self._layout_warned = False
+        self._decoder = layout_decoder(layout).with_extra(
+            k for k in self._listeners if k in OPTIONAL_FIELD_KEYS
+        )
+        return self._decoder
+
+    @callback
+    def _async_update_decoder(self) -> None:
+        """Decode the optional INFO fields that have a listener (an enabled sensor), and only those."""
+        if self._decoder is None:
+            # compiled with the current listeners once the layout is known
+            return
+        decoder = self._decoder.with_extra(k for k in self._listeners if k in OPTIONAL_FIELD_KEYS)
+        if decoder is not self._decoder:
+            self._decoder = decoder
+            # the next frame must be decoded again even if it repeats the last one
+            self._last_frame = None
+
+    @callback
+    def _async_notify(self, changed: set[str]) -> None:
+        if changed:
+            for derived, inputs in DERIVED_KEYS.items():
+                if not changed.isdisjoint(inputs):
+                    changed.add(derived)
+
+        for key, count in list(self._listeners.items()):
+            if key in changed:
+                async_dispatcher_send(self.hass, dispatch_signal(self.entry_id, key))
+            else:
+                self.suppressed_writes += count
+
+    @callback
+    def _async_poll_tick(self, now=None) -> None:
+        """Send the INFO/PO1800NG polls that are due."""
+        mono = time.monotonic()
+        if self.available:
+            self._async_update_available(mono)
+        if not self._mqtt_connected:
+            return
+        if self._info_poll.due(mono):
+            self._send_info_command()
+        if self._po1800ng_poll.due(mono):
+            self._send_po1800ng_command()
+
+    @callback
+    def _async_poll_start(self, phase: float) -> None:
+        """Send the initial INFO and PO1800NG polls, then move later ones to this hub's phase."""
+        self.poll_phase = phase
+        self._async_poll_tick()
+        mono = time.monotonic()
+        epoch = async_get_poll_wheel(self.hass).epoch
+        self._info_poll.stagger(mono, phase, epoch)
+        self._po1800ng_poll.stagger(mono, phase, epoch)
+
+    @callback
+    def poll_diagnostics(self) -> dict:
+        now = time.monotonic()
+        return {
+            "phase": None if self.poll_phase is None else round(self.poll_phase, 3),
+            "info": self._info_poll.as_dict(now),
+            "po1800ng": self._po1800ng_poll.as_dict(now),
+        }
+
+    @callback
+    def command_diagnostics(self) -> dict:
+        return self._commands.as_dict()
 
-        self.state = new_state
+    @callback
+    def metrics_diagnostics(self) -> dict:
+        data = self.metrics.as_dict()
+        data["commands_sent"] = self._commands.sent
+        return data
 
-        self.hass.create_task(self._async_save_state())
+    @callback
+    def limiter_diagnostics(self) -> dict | None:
+        return self.limiter.as_dict() if self.limiter is not None else None
+
+    @callback
+    def offline_diagnostics(self) -> dict:
+        data = self._offline.as_dict()
+        data["available"] = self.available
+        age = time.monotonic() - self._last_frame_at
+        # infinite while waiting for the first frame after an outage
+        data["last_frame_age"] = round(age, 1) if age != float("inf") else None
+        return data
 
-        async_dispatcher_send(self.hass, f"{DISPATCH_SIGNAL}_{self.entry_id}")
+    @callback
+    def history_diagnostics(self) -> dict:
+        return self.history.as_dict(time.monotonic())
 
     @callback
     def _send_info_command(self, now=None) -> None:
         """Send INFO command to request current state from teknix."""
         info_cmd = build_info_command()
-        self.hass.create_task(self.async_send_command(info_cmd))
+        self._commands.async_enqueue(info_cmd, info_cmd)
 
     @callback
     def _send_po1800ng_command(self, now=None) -> None:
         """Send PO1800NG command periodically."""
-        self.hass.create_task(self.async_send_command("PO1800NG"))
+        self._commands.async_enqueue("PO1800NG", "PO1800NG")
 
     async def async_send_command(self, raw_cmd: str) -> None:
         topic = cmd_topic(self.serial)
         _LOGGER.info("Sending MQTT command to %s: %s", topic, raw_cmd)
         await mqtt.async_publish(self.hass, topic, raw_cmd)
 
-    # Alias used by entities
-    async def publish(self, raw_cmd: str) -> None:
-        await self.async_send_command(raw_cmd)
+    @callback
+    def async_request(
+        self,
+        slot: str,
+        raw_cmd: str,
+        values: Mapping[str, object],
+        *,
+        urgent: bool = False,
+        on_sent: Callable[[], None] | None = None,
+    ) -> asyncio.Future:
+        """Queue a control command that should bring the given state keys to values.
+
+        Commands for the same slot (a switch, a target temperature, the step pair)
+        replace each other until sent; a command that would not change anything is dropped.
+        The returned future resolves once an INFO frame reports the values, or raises
+        TeknixCommandError if the heater never confirms them (TeknixCommandHeld while
+        it is offline: the command is replayed once it reports again). An urgent command
+        goes ahead of queued ones; on_sent is called once it is published.
+        """
+        return self.async_request_batch([(slot, raw_cmd, values)], urgent=urgent, on_sent=on_sent)
 
-    def set_pending(self, key: str, value: object, ttl: float = 2.0) -> None:
+    @callback
+    def async_request_batch(
+        self,
+        requests: Iterable[tuple[str, str, Mapping[str, object]]],
+        *,
+        urgent: bool = False,
+        on_sent: Callable[[], None] | None = None,
+    ) -> asyncio.Future:
+        """Queue several (slot, command, values) requests as one batch.
+
+        The commands go out back to back and are confirmed by the same INFO poll;
+        state is updated and listeners are notified once for the whole batch.
+        While the heater is unavailable the requests are held instead (latest per
+        slot, no optimistic update) and the returned future raises TeknixCommandHeld.
+        """
+        if not self.available:
+            if not self._offline.async_put(requests, self.state):
+                return self._done_future()
+            future = self.hass.loop.create_future()
+            future.set_exception(self._held_error())
+            return future
+        futures = []
+        optimistic: dict = {}
+        pending: dict = {}
+        for slot, raw_cmd, values in requests:
+            values = dict(values)
+            baseline = self._commands.baseline(slot)
+            if slot not in self._commands:
+                joined = self._commands.async_join(slot, values)
+                if joined is not None:
+                    # already sent, waiting for its confirmation
+                    futures.append(joined)
+                    continue
+                # compared with confirmed values only: a pending key is still optimistic
+                if all(k not in self._pending and self.state.get(k) == v for k, v in values.items()):
+                    self._commands.dropped += 1
+                    _LOGGER.debug("Dropping %s: %s already in requested state", raw_cmd, slot)
+                    continue
+                baseline = {k: self.state.get(k) for k in values}
+            elif baseline == values:
+                # Back to what the device already reports; nothing to send
+                self._commands.async_cancel(slot)
+                self._pending.async_discard(values)
+                optimistic.update(values)
+                continue
+
+            futures.append(self._commands.async_enqueue(
+                slot, raw_cmd, values, baseline, urgent=urgent, on_sent=on_sent
+            ))
+            # one callback per batch
+            on_sent = None
+            optimistic.update(values)
+            pending.update(values)
+
+        if pending:
+            # mark keys as pending to suppress racing telemetry until the commands are confirmed
+            ttl = self._commands.confirm_window()
+            for key, value in pending.items():
+                self.set_pending(key, value, ttl)
+            # poll faster for a while so the change is confirmed quickly
+            self._info_poll.command_sent(time.monotonic())
+        if optimistic:
+            self.async_update_state(optimistic)
+            # state no longer matches the last frame; its next repeat must be merged again
+            self._last_frame = None
+
+        if not futures:
+            return self._done_future()
+        if len(futures) == 1:
+            return futures[0]
+        return asyncio.gather(*futures)
+
+    @callback
+    def async_apply_profile(self, profile: Mapping[str, object]) -> asyncio.Future:
+        """Bring the heater to profile (desired state values) with the fewest commands."""
+        return self.async_request_batch(build_profile_commands(self.state, profile, self.step_max))
+
+    def _done_future(self) -> asyncio.Future:
+        future = self.hass.loop.create_future()
+        future.set_result(None)
+        return future
+
+    def _held_error(self) -> TeknixCommandHeld:
+        return TeknixCommandHeld(f"Teknix {self.serial} is offline; the command is held until it reports again")
+
+    @callback
+    def _async_command_failed(self, slot: str, values: Mapping[str, object]) -> None:
+        """Stop masking telemetry for a command the heater never confirmed."""
+        _LOGGER.warning("Teknix %s did not confirm %s=%s", self.serial, slot, values)
+        self._pending.async_release(values)
+
+    @callback
+    def _async_pending_released(self, reported: dict) -> None:
+        """Replace optimistic values that were never confirmed and ask for a fresh frame."""
+        self.async_update_state(reported)
+        self._send_info_command()
+
+    def set_pending(self, key: str, value: object, ttl: float = PENDING_TTL_SECONDS) -> None:
         """Mark a key as locally overridden for a brief period to avoid races.
 
         During the TTL, incoming differing telemetry for this key will be ignored.
         """
-        self._pending_until[key] = time.monotonic() + max(0.1, float(ttl))
-        self._pending_values[key] = value
+        self._pending.async_set(key, value, ttl)
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Batch state changes into one Store write per save_delay window.
+
+        Store also flushes pending delayed writes on Home Assistant shutdown.
+        """
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, self._save_delay)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._dirty = False
+        self.metrics.store_saves += 1
+        return {k: v for k, v in self.state.as_dict().items() if k not in VOLATILE_STATE_KEYS}
 
     async def _async_save_state(self) -> None:
         """Save current state to storage."""
         try:
-            await self._store.async_save(self.state)
+            await self._store.async_save(self._data_to_save())
         except Exception as e:
             _LOGGER.warning("Failed to save teknix state: %s", e)
 
@@ -169,17 +659,30 @@ class TeknixHub:
         try:
             stored_data = await self._store.async_load()
             if stored_data:
-                self.state = stored_data
+                self.state = TeknixState(stored_data)
+                self._energy.total_kwh = self.state.energy_kwh or 0.0
                 _LOGGER.info("Restored teknix state from storage: %s", self.state)
         except Exception as e:
             _LOGGER.warning("Failed to restore teknix state: %s", e)
 
 
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     serial = entry.data[CONF_SERIAL]
     model = entry.data[CONF_MODEL]
 
-    hub = TeknixHub(hass, serial, model, entry.entry_id)
+    hub = TeknixHub(
+        hass, serial, model, entry.entry_id,
+        save_delay=entry.options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY_SECONDS),
+        limit_sensor=entry.options.get(CONF_LIMIT_SENSOR),
+        limit_kw=entry.options.get(CONF_LIMIT_POWER),
+        limit_hysteresis_kw=entry.options.get(CONF_LIMIT_HYSTERESIS, DEFAULT_LIMIT_HYSTERESIS_KW),
+        budget_priority=entry.options.get(CONF_BUDGET_PRIORITY, DEFAULT_BUDGET_PRIORITY),
+    )
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = hub
 
@@ -196,9 +699,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hub.async_start()
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hub: TeknixHub = hass.data[DOMAIN][entry.entry_id]
     await hub.async_stop()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .command_queue import TeknixCommandHeld
+from .commands import build_power_command
+from .const import DOMAIN, DATA_ALLOCATOR, POWER_STEP_SLOT
+
+_LOGGER = logging.getLogger(__name__)
+
+# the derived key whose inputs (active loops, steps) are all the allocator reads
+_INPUTS_KEY = "current_consumption"
+# set by every decoded frame and never restored, so it stays None until the first one
+_FRAME_KEY = "raw"
+
+
+@callback
+def async_get_allocator(hass: HomeAssistant) -> PowerBudgetAllocator:
+    """Return the domain-wide power budget allocator, creating it on first use."""
+    data = hass.data.setdefault(DOMAIN, {})
+    allocator = data.get(DATA_ALLOCATOR)
+    if allocator is None:
+        allocator = data[DATA_ALLOCATOR] = PowerBudgetAllocator(hass)
+    return allocator
+
+
+class _Heater:
+    __slots__ = ("hub", "priority", "wanted", "demand", "allocated", "sent", "unsub")
+
+    def __init__(self, hub, priority: int):
+        self.hub = hub
+        self.priority = priority
+        # steps the user asked for; the allocator only ever lowers them
+        self.wanted: Tuple[int, int] = (1, 1)
+        # step the heater would run at with the wanted steps (0: no loop active)
+        self.demand = 0
+        # step granted by the allocator
+        self.allocated = 0
+        # steps the allocator itself last requested
+        self.sent: Optional[Tuple[int, int]] = None
+        self.unsub = None
+
+    @property
+    def element_kw(self) -> float:
+        return self.hub.element_kw
+
+
+class PowerBudgetAllocator:
+    """Split one kW budget between all Teknix heaters.
+
+    Each heater's demand is the step it would run at with the steps the user
+    set. Every demanding heater gets at least one step, then the rest of the
+    budget is handed out one step at a time, highest priority first and round
+    robin within a priority, never above demand. Heaters are capped by lowering
+    their steps through the normal command path; only changed steps are sent.
+
+    Input changes arrive per heater through the hub's dispatcher. A change that
+    does not move the heater's demand is ignored, and while no heater is capped
+    a demand change that fits the free budget is granted without touching the
+    other heaters; only the rest needs a new allocation.
+
+    A heater joins the allocation with its first decoded frame: its restored
+    state may be stale and must not cause step cuts.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._store = Store(hass, 1, f"{DOMAIN}.power_budget")
+        self._loaded = False
+        self.budget_kw: Optional[float] = None
+        self._heaters: Dict[Any, _Heater] = {}
+        # hubs without a decoded frame yet -> unsubscribe from their first frame
+        self._waiting: Dict[Any, Callable[[], None]] = {}
+        self.allocations = 0
+        self.fast_path = 0
+
+    async def _async_load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        data = await self._store.async_load()
+        if data:
+            self.budget_kw = data.get("budget_kw")
+
+    async def async_add(self, hub, priority: int) -> None:
+        await self._async_load()
+        if hub.state.raw is None:
+            self._waiting[hub] = hub.async_subscribe(_FRAME_KEY, partial(self._async_first_frame, hub, priority))
+            return
+        self._async_join(hub, priority)
+
+    @callback
+    def _async_first_frame(self, hub, priority: int) -> None:
+        unsub = self._waiting.pop(hub, None)
+        if unsub is None:
+            return
+        unsub()
+        self._async_join(hub, priority)
+
+    @callback
+    def _async_join(self, hub, priority: int) -> None:
+        heater = self._heaters[hub] = _Heater(hub, int(priority))
+        heater.unsub = hub.async_subscribe(_INPUTS_KEY, partial(self._async_inputs_changed, heater))
+        self._async_read_inputs(heater)
+        self._async_allocate()
+
+    @callback
+    def async_remove(self, hub) -> None:
+        unsub = self._waiting.pop(hub, None)
+        if unsub is not None:
+            unsub()
+            return
+        heater = self._heaters.pop(hub, None)
+        if heater is None:
+            return
+        heater.unsub()
+        # the freed budget may uncap others
+        self._async_allocate()
+
+    async def async_set_budget(self, budget_kw: Optional[float]) -> None:
+        await self._async_load()
+        self.budget_kw = budget_kw if budget_kw else None
+        await self._store.async_save({"budget_kw": self.budget_kw})
+        self._async_allocate()
+
+    @callback
+    def _async_read_inputs(self, heater: _Heater) -> bool:
+        """Refresh wanted steps and demand from hub state; return True if demand changed."""
+        state = heater.hub.state
+        step_max = heater.hub.step_max
+        steps = (
+            max(1, min(state.house_heating_step or 1, step_max)),
+            max(1, min(state.tank_heating_step or 1, step_max)),
+        )
+        if steps != heater.sent:
+            # not our own command (or its confirmation): the user changed the steps
+            heater.wanted = steps
+            heater.sent = None
+
+        demand = max(
+            heater.wanted[0] if state.house_heating_active else 0,
+            heater.wanted[1] if state.tank_heating_active else 0,
+        )
+        changed = demand != heater.demand
+        heater.demand = demand
+        return changed
+
+    @callback
+    def _async_inputs_changed(self, heater: _Heater) -> None:
+        if not self._async_read_inputs(heater):
+            return
+        if self.budget_kw is None:
+            heater.allocated = heater.demand
+            return
+
+        if all(h.allocated >= h.demand for h in self._heaters.values() if h is not heater):
+            used_kw = sum(h.allocated * h.element_kw for h in self._heaters.values())
+            extra_kw = (heater.demand - heater.allocated) * heater.element_kw
+            if extra_kw <= 0 or used_kw + extra_kw <= self.budget_kw + 1e-9:
+                # nobody else is capped and the change fits: grant it as is
+                self.fast_path += 1
+                heater.allocated = heater.demand
+                return
+        self._async_allocate()
+
+    @callback
+    def _async_allocate(self) -> None:
+        heaters = list(self._heaters.values())
+        if self.budget_kw is None:
+            for heater in heaters:
+                heater.allocated = heater.demand
+                self._async_apply(heater)
+            return
+
+        self.allocations += 1
+        for heater in heaters:
+            heater.allocated = 0
+        demanding = sorted((h for h in heaters if h.demand > 0), key=lambda h: -h.priority)
+
+        # every running heater draws at least one step; those cannot be shed by steps alone
+        left_kw = self.budget_kw
+        for heater in demanding:
+            heater.allocated = 1
+            left_kw -= heater.element_kw
+        if left_kw < 0:
+            _LOGGER.warning(
+                "Teknix power budget %.2f kW is below the lowest steps of all running heaters",
+                self.budget_kw,
+            )
+
+        i = 0
+        while i < len(demanding):
+            # one priority level, served round robin
+            j = i
+            while j < len(demanding) and demanding[j].priority == demanding[i].priority:
+                j += 1
+            level = demanding[i:j]
+            progress = True
+            while progress:
+                progress = False
+                for heater in level:
+                    if heater.allocated < heater.demand and heater.element_kw <= left_kw + 1e-9:
+                        heater.allocated += 1
+                        left_kw -= heater.element_kw
+                        progress = True
+            i = j
+
+        for heater in heaters:
+            self._async_apply(heater)
+
+    @callback
+    def _async_apply(self, heater: _Heater) -> None:
+        """Request the wanted steps limited to the allocation, if they differ from state."""
+        if heater.demand == 0:
+            return
+        state = heater.hub.state
+        steps = heater.wanted
+        if heater.allocated < heater.demand:
+            # only the running loops need capping
+            cap = max(1, heater.allocated)
+            steps = (
+                min(steps[0], cap) if state.house_heating_active else steps[0],
+                min(steps[1], cap) if state.tank_heating_active else steps[1],
+            )
+        if (state.house_heating_step, state.tank_heating_step) == steps:
+            return
+        heater.sent = steps
+        house, tank = steps
+        future = heater.hub.async_request(
+            POWER_STEP_SLOT,
+            build_power_command(house, tank),
+            {"house_heating_step": house, "tank_heating_step": tank},
+        )
+        future.add_done_callback(partial(self._command_done, heater.hub.serial))
+
+    @staticmethod
+    def _command_done(serial: str, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is None:
+            return
+        if isinstance(future.exception(), TeknixCommandHeld):
+            # replayed on reconnect; the hub already warned about the outage
+            _LOGGER.debug("Teknix %s: power budget command held: %s", serial, future.exception())
+        else:
+            _LOGGER.warning("Teknix %s: power budget command failed: %s", serial, future.exception())
+
+    def as_dict(self) -> Dict[str, Any]:
+        heaters: List[Dict[str, Any]] = [
+            {
+                "serial": h.hub.serial,
+                "priority": h.priority,
+                "element_kw": h.element_kw,
+                "wanted_steps": h.wanted,
+                "demand_step": h.demand,
+                "allocated_step": h.allocated,
+            }
+            for h in self._heaters.values()
+        ]
+        return {
+            "budget_kw": self.budget_kw,
+            "allocated_kw": round(sum(h.allocated * h.element_kw for h in self._heaters.values()), 2),
+            "allocations": self.allocations,
+            "fast_path": self.fast_path,
+            "heaters": heaters,
+            "waiting_for_frame": [hub.serial for hub in self._waiting],
+        }
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .fields import INFO_FIELDS
+
+# Values the heater accepts in commands
+STEP_RANGE = range(1, 7)
+TEMP_RANGE = range(30, 81)
+
+INFO_COMMAND = "INFO"
+
+# Raw integer range of each range-checked INFO frame position (see fields.py);
+# anything outside is corrupted on the serial line
+FIELD_RANGES: Mapping[str, Tuple[int, int]] = MappingProxyType({
+    f.key: (f.lo, f.hi) for f in INFO_FIELDS if f.lo is not None
+})
+
+
+# --- checksum formulas, only evaluated while building the tables ---
+
+def _power_command(house_step: int, tank_step: int) -> str:
+    return f"T19{house_step:02d}20{tank_step:02d}00{12 + house_step + tank_step:02d}Z"
+
+
+def _house_temp_command(temp_c: int, legacy_hex: bool = False) -> str:
+    tens, ones = divmod(temp_c, 10)
+    raw = 5 + (tens - 3) + ones
+    suffix = f"{raw:02X}" if legacy_hex else f"{raw:02d}"
+    return f"T02{temp_c:02d}00{suffix}Z"
+
+
+def _tank_temp_command(temp_c: int) -> str:
+    tens, ones = divmod(temp_c, 10)
+    return f"T09{temp_c:02d}00{9 + tens + ones:02d}Z"
+
+
+# --- outbound tables ---
+
+POWER_COMMANDS: Mapping[Tuple[int, int], str] = MappingProxyType({
+    (house, tank): _power_command(house, tank) for house in STEP_RANGE for tank in STEP_RANGE
+})
+HOUSE_TEMP_COMMANDS: Mapping[int, str] = MappingProxyType({t: _house_temp_command(t) for t in TEMP_RANGE})
+HOUSE_TEMP_COMMANDS_HEX: Mapping[int, str] = MappingProxyType({t: _house_temp_command(t, True) for t in TEMP_RANGE})
+TANK_TEMP_COMMANDS: Mapping[int, str] = MappingProxyType({t: _tank_temp_command(t) for t in TEMP_RANGE})
+SWITCH_COMMANDS: Mapping[str, Mapping[bool, str]] = MappingProxyType({
+    "boiler_power_state": MappingProxyType({True: "T01010002Z", False: "T01000001Z"}),
+    "house_heating_active": MappingProxyType({True: "T120111010007Z", False: "T120011010006Z"}),
+    "tank_heating_active": MappingProxyType({True: "T13010005Z", False: "T13000004Z"}),
+})
+
+
+# --- inbound (command -> state values) table ---
+
+def _command_values() -> Dict[str, Mapping[str, Any]]:
+    table: Dict[str, Mapping[str, Any]] = {}
+    for (house, tank), cmd in POWER_COMMANDS.items():
+        table[cmd] = MappingProxyType({"house_heating_step": house, "tank_heating_step": tank})
+    # legacy hex house commands are encode-only: their suffixes are valid decimal
+    # suffixes of other temperatures, so decoding them would be ambiguous
+    for temps, key in (
+        (HOUSE_TEMP_COMMANDS, "house_target_temp"),
+        (TANK_TEMP_COMMANDS, "tank_target_temp"),
+    ):
+        for temp_c, cmd in temps.items():
+            table[cmd] = MappingProxyType({key: temp_c})
+    for key, commands in SWITCH_COMMANDS.items():
+        for turn_on, cmd in commands.items():
+            table[cmd] = MappingProxyType({key: turn_on})
+    return table
+
+
+COMMAND_VALUES: Mapping[str, Mapping[str, Any]] = MappingProxyType(_command_values())
+
+
+def decode_command(command: str) -> Optional[Mapping[str, Any]]:
+    """Return the state values a T..Z command sets, or None if it is not a valid command.
+
+    A command with a wrong checksum or an out-of-range value is not in the table.
+    """
+    return COMMAND_VALUES.get(command)
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TeknixCommandError(HomeAssistantError):
+    """The heater did not confirm a command."""
+
+
+class TeknixCommandHeld(TeknixCommandError):
+    """The heater is offline; the command is held and sent once it reports again."""
+
+
+class _Command:
+    __slots__ = ("command", "values", "baseline", "futures", "attempts", "sent_at", "on_sent", "unsub_timeout")
+
+    def __init__(self, command: str, values: Optional[Mapping[str, Any]], baseline: Optional[Mapping[str, Any]]):
+        self.command = command
+        # state values an INFO frame must report to confirm the command (None for polls)
+        self.values = values
+        # state values before the slot's first optimistic update
+        self.baseline = baseline
+        self.futures: List[asyncio.Future] = []
+        self.attempts = 0
+        # monotonic time of the first send
+        self.sent_at: Optional[float] = None
+        # called once, right after the first send
+        self.on_sent: Optional[Callable[[], None]] = None
+        self.unsub_timeout: Optional[Callable[[], None]] = None
+
+
+class CommandQueue:
+    """Per-hub outbound queue: one pending command per control slot, paced sends.
+
+    Enqueueing a command for a slot that is still waiting replaces it in place,
+    so a burst of UI or automation changes collapses into the latest value.
+    Sent commands stay in flight until an INFO frame reports their values; an
+    INFO poll is queued right after each send, unconfirmed commands are resent
+    after confirm_timeout and fail with TeknixCommandError after max_attempts.
+    on_confirmed receives the time from a command's first send to its confirmation.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[str], Awaitable[None]],
+        min_interval: float,
+        confirm_poll: str,
+        confirm_timeout: float,
+        max_attempts: int,
+        on_failed: Optional[Callable[[str, Mapping[str, Any]], None]] = None,
+        on_confirmed: Optional[Callable[[float], None]] = None,
+    ):
+        self.hass = hass
+        self._send = send
+        self._min_interval = float(min_interval)
+        self._confirm_poll = confirm_poll
+        self._confirm_timeout = float(confirm_timeout)
+        self._max_attempts = max(1, int(max_attempts))
+        self._on_failed = on_failed
+        self._on_confirmed = on_confirmed
+
+        self._queue: Dict[str, _Command] = {}
+        self._inflight: Dict[str, _Command] = {}
+        self._last_sent = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.retried = 0
+        self.confirmed = 0
+        self.failed = 0
+
+    def __contains__(self, slot: str) -> bool:
+        return slot in self._queue
+
+    def baseline(self, slot: str) -> Optional[Mapping[str, Any]]:
+        entry = self._queue.get(slot)
+        return entry.baseline if entry else None
+
+    def backlog_delay(self) -> float:
+        """Seconds until a command enqueued now would be sent."""
+        wait = self._last_sent + self._min_interval - time.monotonic()
+        return max(0.0, wait) + len(self._queue) * self._min_interval
+
+    def confirm_window(self) -> float:
+        """Upper bound on how long a command enqueued now may stay unconfirmed."""
+        return self.backlog_delay() + self._max_attempts * (self._confirm_timeout + self._min_interval)
+
+    @callback
+    def async_enqueue(
+        self,
+        slot: str,
+        command: str,
+        values: Optional[Mapping[str, Any]] = None,
+        baseline: Optional[Mapping[str, Any]] = None,
+        urgent: bool = False,
+        on_sent: Optional[Callable[[], None]] = None,
+    ) -> Optional[asyncio.Future]:
+        """Queue command for slot; return a future resolved on confirmation if values are given.
+
+        An urgent command is moved to the front of the queue, so it waits for
+        nothing but the pacing interval.
+        """
+        entry = self._queue.get(slot)
+        if entry is not None:
+            self.coalesced += 1
+            entry.command = command
+            entry.values = values
+            entry.attempts = 0
+        else:
+            entry = self._queue[slot] = _Command(command, values, baseline)
+            superseded = self._inflight.pop(slot, None)
+            if superseded is not None:
+                # the old command may already be applied, so there is no baseline to return to
+                self._cancel_timeout(superseded)
+                entry.futures = superseded.futures
+                entry.baseline = None
+        entry.on_sent = on_sent
+        if urgent and next(iter(self._queue)) != slot:
+            self._queue = {slot: entry, **self._queue}
+
+        future = None
+        if values is not None:
+            future = self.hass.loop.create_future()
+            entry.futures.append(future)
+
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_drain())
+        return future
+
+    @callback
+    def async_join(self, slot: str, values: Mapping[str, Any]) -> Optional[asyncio.Future]:
+        """Return a confirmation future for a sent command with these values, or None if there is none."""
+        entry = self._inflight.get(slot)
+        if entry is None or entry.values != values:
+            return None
+        self.coalesced += 1
+        future = self.hass.loop.create_future()
+        entry.futures.append(future)
+        return future
+
+    @callback
+    def async_cancel(self, slot: str) -> None:
+        """Drop a queued command; its callers are told the state is already right."""
+        entry = self._queue.pop(slot, None)
+        if entry is not None:
+            self.dropped += 1
+            self._resolve(entry)
+
+    @callback
+    def async_frame_received(self, reported: Mapping[str, Any]) -> None:
+        """Confirm in-flight commands whose values the device now reports."""
+        if not self._inflight:
+            return
+        for slot, entry in list(self._inflight.items()):
+            if all(reported.get(k) == v for k, v in entry.values.items()):
+                del self._inflight[slot]
+                self._cancel_timeout(entry)
+                self.confirmed += 1
+                if self._on_confirmed is not None and entry.sent_at is not None:
+                    self._on_confirmed(time.monotonic() - entry.sent_at)
+                self._resolve(entry)
+
+    @callback
+    def async_take_controls(self, error: Exception) -> List[Tuple[str, str, Mapping[str, Any]]]:
+        """Remove all control commands, in flight or queued, and return them as (slot, command, values).
+
+        Only polls stay queued. Callers waiting on the removed commands get error,
+        as none of them is confirmed.
+        """
+        taken = []
+        for commands in (self._inflight, self._queue):
+            for slot, entry in list(commands.items()):
+                if entry.values is None:
+                    continue
+                del commands[slot]
+                self._cancel_timeout(entry)
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(error)
+                taken.append((slot, entry.command, entry.values))
+        return taken
+
+    async def _async_drain(self) -> None:
+        try:
+            while self._queue:
+                wait = self._last_sent + self._min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                slot = next(iter(self._queue))
+                entry = self._queue.pop(slot)
+                self._last_sent = time.monotonic()
+                self.sent += 1
+                try:
+                    await self._send(entry.command)
+                except Exception as e:
+                    _LOGGER.warning("Failed to send teknix command %s: %s", entry.command, e)
+                if entry.on_sent is not None:
+                    on_sent, entry.on_sent = entry.on_sent, None
+                    on_sent()
+
+                if entry.values is not None:
+                    if entry.sent_at is None:
+                        entry.sent_at = self._last_sent
+                    entry.attempts += 1
+                    self._inflight[slot] = entry
+                    # the confirming poll goes out after everything already queued
+                    timeout = self._confirm_timeout + len(self._queue) * self._min_interval
+                    entry.unsub_timeout = async_call_later(
+                        self.hass, timeout, partial(self._async_timeout, slot)
+                    )
+                    # ask for a fresh frame instead of waiting for the next regular poll
+                    self.async_enqueue(self._confirm_poll, self._confirm_poll)
+        finally:
+            self._task = None
+
+    @callback
+    def _async_timeout(self, slot: str, _now=None) -> None:
+        entry = self._inflight.pop(slot, None)
+        if entry is None:
+            return
+        entry.unsub_timeout = None
+
+        if entry.attempts < self._max_attempts:
+            self.retried += 1
+            _LOGGER.debug("Resending unconfirmed teknix command %s", entry.command)
+            if slot not in self._queue:
+                self._queue[slot] = entry
+                if self._task is None:
+                    self._task = self.hass.async_create_task(self._async_drain())
+            return
+
+        self.failed += 1
+        err = TeknixCommandError(
+            f"Teknix did not confirm {entry.command} after {entry.attempts} attempts"
+        )
+        for future in entry.futures:
+            if not future.done():
+                future.set_exception(err)
+        if self._on_failed is not None:
+            self._on_failed(slot, entry.values)
+
+    @staticmethod
+    def _resolve(entry: _Command) -> None:
+        for future in entry.futures:
+            if not future.done():
+                future.set_result(None)
+
+    @staticmethod
+    def _cancel_timeout(entry: _Command) -> None:
+        if entry.unsub_timeout is not None:
+            entry.unsub_timeout()
+            entry.unsub_timeout = None
+
+    async def async_stop(self) -> None:
+        for entry in (*self._queue.values(), *self._inflight.values()):
+            self._cancel_timeout(entry)
+            for future in entry.futures:
+                future.cancel()
+        self._queue.clear()
+        self._inflight.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": list(self._queue),
+            "in_flight": list(self._inflight),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "retried": self.retried,
+            "confirmed": self.confirmed,
+            "failed": self.failed,
+        }
@@ -1,60 +1,104 @@
 from __future__ import annotations
 
-def build_power_command(house_step: int, tank_step: int) -> str:
-    _validate_step(house_step)
-    _validate_step(tank_step)
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Tuple
 
-    HH = f"{house_step:02d}"
-    WW = f"{tank_step:02d}"
-    SS = f"{12 + house_step + tank_step:02d}"
-    return f"T19{HH}20{WW}00{SS}Z"
+from .codec import (
+    HOUSE_TEMP_COMMANDS,
+    HOUSE_TEMP_COMMANDS_HEX,
+    INFO_COMMAND,
+    POWER_COMMANDS,
+    SWITCH_COMMANDS,
+    TANK_TEMP_COMMANDS,
+)
+from .const import POWER_STEP_SLOT
 
+if TYPE_CHECKING:
+    from .state import TeknixState
 
-def build_house_temp_command(temp_c: int, legacy_hex: bool = False) -> str:
-    _validate_temp(temp_c)
+# Commands are looked up in the tables precomputed by codec.py;
+# a missing key is the only validation needed.
 
-    tens, ones = divmod(temp_c, 10)
-    base = 5 + (tens - 3)
-    raw = base + ones
+def build_power_command(house_step: int, tank_step: int) -> str:
+    try:
+        return POWER_COMMANDS[house_step, tank_step]
+    except KeyError:
+        raise ValueError("Step must be in range 1..6.") from None
 
-    suffix = f"{raw:02d}" if not legacy_hex else f"{raw:02X}"
 
-    return f"T02{temp_c:02d}00{suffix}Z"
+def build_house_temp_command(temp_c: int, legacy_hex: bool = False) -> str:
+    try:
+        return (HOUSE_TEMP_COMMANDS_HEX if legacy_hex else HOUSE_TEMP_COMMANDS)[temp_c]
+    except KeyError:
+        raise ValueError("Temperature must be in range 30..80 °C.") from None
 
 
 def build_tank_temp_command(temp_c: int) -> str:
-    _validate_temp(temp_c)
-
-    tens, ones = divmod(temp_c, 10)
-    suffix_dec = f"{9 + tens + ones:02d}"
-    return f"T09{temp_c:02d}00{suffix_dec}Z"
+    try:
+        return TANK_TEMP_COMMANDS[temp_c]
+    except KeyError:
+        raise ValueError("Temperature must be in range 30..80 °C.") from None
 
 # --- switch command builders ---
 
 def build_boiler_power_command(turn_on: bool) -> str:
-    return "T01010002Z" if turn_on else "T01000001Z"
+    return SWITCH_COMMANDS["boiler_power_state"][bool(turn_on)]
 
 
 def build_house_heating_active_command(turn_on: bool) -> str:
-    return "T120111010007Z" if turn_on else "T120011010006Z"
+    return SWITCH_COMMANDS["house_heating_active"][bool(turn_on)]
 
 
 def build_tank_heating_active_command(turn_on: bool) -> str:
-    return "T13010005Z" if turn_on else "T13000004Z"
+    return SWITCH_COMMANDS["tank_heating_active"][bool(turn_on)]
 
 # --- info command ---
 
 def build_info_command() -> str:
     """Build INFO command to request current state from teknix."""
-    return "INFO"
-
-# --- helpers ---
-
-def _validate_step(step: int) -> None:
-    if not (1 <= step <= 6):
-        raise ValueError("Step must be in range 1..6.")
-
-
-def _validate_temp(temp_c: int) -> None:
-    if not (30 <= temp_c <= 80):
-        raise ValueError("Temperature must be in range 30..80 °C.")
\ No newline at end of file
+    return INFO_COMMAND
+
+# --- profiles ---
+
+def build_profile_commands(
+    state: TeknixState, profile: Mapping[str, Any], step_max: int = 6
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Return the (slot, command, values) requests that bring state to profile.
+
+    profile holds desired state values (switch keys, target temps, steps); keys
+    that are missing or already right are skipped, and both steps travel in one
+    power command. Switching the boiler on goes first, switching it off last.
+    """
+    requests = []
+    for key in SWITCH_COMMANDS:
+        value = profile.get(key)
+        if value is not None and state.get(key) != bool(value):
+            requests.append((key, SWITCH_COMMANDS[key][bool(value)], {key: bool(value)}))
+
+    for key, table in (("house_target_temp", HOUSE_TEMP_COMMANDS), ("tank_target_temp", TANK_TEMP_COMMANDS)):
+        value = profile.get(key)
+        if value is not None and state.get(key) != value:
+            try:
+                requests.append((key, table[value], {key: value}))
+            except KeyError:
+                raise ValueError("Temperature must be in range 30..80 °C.") from None
+
+    house = profile.get("house_heating_step")
+    tank = profile.get("tank_heating_step")
+    if house is not None or tank is not None:
+        steps = {}
+        for key, value in (("house_heating_step", house), ("tank_heating_step", tank)):
+            if value is None:
+                value = state.get(key, 1)
+            steps[key] = max(1, min(int(value), step_max))
+        if any(state.get(k) != v for k, v in steps.items()):
+            command = build_power_command(steps["house_heating_step"], steps["tank_heating_step"])
+            requests.append((POWER_STEP_SLOT, command, steps))
+
+    def _order(request) -> int:
+        slot, _, values = request
+        if slot != "boiler_power_state":
+            return 1
+        return 0 if values[slot] else 2
+
+    requests.sort(key=_order)
+    return requests
@@ -1,13 +1,36 @@
 from __future__ import annotations
+import time
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.helpers import selector
-from .const import DOMAIN, CONF_SERIAL, CONF_MODEL, MODELS
+from homeassistant.helpers.service_info.mqtt import MqttServiceInfo
+from .const import (
+    DOMAIN, CONF_SERIAL, CONF_MODEL, CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY_SECONDS, MODELS,
+    DATA_DISCOVERY_CHECKED, DISCOVERY_RECHECK_SECONDS, device_serial, model_max_step,
+    CONF_TEMP_DEADBAND, CONF_TEMP_MIN_INTERVAL, CONF_TEMP_MAX_INTERVAL,
+    CONF_LIMIT_SENSOR, CONF_LIMIT_POWER, CONF_LIMIT_HYSTERESIS, DEFAULT_LIMIT_HYSTERESIS_KW,
+    CONF_BUDGET_PRIORITY, DEFAULT_BUDGET_PRIORITY,
+    DEFAULT_TEMP_DEADBAND, DEFAULT_TEMP_MIN_INTERVAL_SECONDS, DEFAULT_TEMP_MAX_INTERVAL_SECONDS,
+)
+from .parser import INFO_DECODER, FrameError, extract_frame
+
+def plausible_models(info) -> list[str]:
+    """Models whose step limit covers the steps an INFO frame reports, in MODELS order.
+
+    A frame carries no model id, so this only narrows the choice: any model
+    could be idling at step 0, but step 5 rules out the 3-element ESPRO 4.5.
+    """
+    step = max(info["house_heating_step"], info["tank_heating_step"])
+    return [m for m in MODELS if model_max_step(m) >= step]
 
 class TeknixConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    def __init__(self):
+        self._serial: str | None = None
+        self._models: list[str] = list(MODELS)
+
     async def async_step_user(self, user_input=None):
         errors = {}
         if user_input is not None:
@@ -29,6 +52,85 @@ class TeknixConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         })
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
 
+    async def async_step_mqtt(self, discovery_info: MqttServiceInfo):
+        """A message on tele/+/RESULT (see manifest.json): set up its sender if it is a heater.
+
+        This only finds the first heater. HA starts a flow for every message on
+        the topic until one aborts with already_configured, so that is the answer
+        once any heater is set up; the router discovers the others from its own
+        subscription (integration_discovery). Until then a device is checked (and
+        its frame decoded) at most once per DISCOVERY_RECHECK_SECONDS.
+        """
+        if self._async_current_entries(include_ignore=False):
+            return self.async_abort(reason="already_configured")
+        _, _, rest = discovery_info.topic.partition("/")
+        serial = device_serial(rest.partition("/")[0])
+        if serial is None:
+            return self.async_abort(reason="not_teknix_device")
+        checked = self.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_DISCOVERY_CHECKED, {})
+        now = time.monotonic()
+        verdict = checked.get(serial)
+        if verdict is not None and verdict[0] > now:
+            return self.async_abort(reason=verdict[1])
+
+        # An ignored heater: not "already_configured", which would make HA stop
+        # listening on the topic before any heater is set up.
+        if serial in self._async_current_ids():
+            return self._async_abort_checked(checked, serial, "heater_configured")
+        frame = extract_frame(discovery_info.payload)
+        if not frame:
+            return self._async_abort_checked(checked, serial, "not_teknix_device")
+        try:
+            info = INFO_DECODER.decode_frame(frame)
+        except FrameError:
+            return self._async_abort_checked(checked, serial, "not_teknix_device")
+        await self.async_set_unique_id(serial)
+
+        # the confirm form stays open; later frames need not start flows that abort anyway
+        checked[serial] = (now + DISCOVERY_RECHECK_SECONDS, "already_in_progress")
+        return await self._async_step_discovered(serial, info)
+
+    async def async_step_integration_discovery(self, discovery_info):
+        """A heater the router heard from: its serial and the steps of its first INFO frame."""
+        serial = discovery_info[CONF_SERIAL]
+        await self.async_set_unique_id(serial)
+        self._abort_if_unique_id_configured()
+        return await self._async_step_discovered(serial, discovery_info)
+
+    async def _async_step_discovered(self, serial: str, info):
+        self._serial = serial
+        self._models = plausible_models(info) or list(MODELS)
+        self.context["title_placeholders"] = {"serial": serial}
+        return await self.async_step_discovery_confirm()
+
+    @callback
+    def _async_abort_checked(self, checked: dict, serial: str, reason: str):
+        checked[serial] = (time.monotonic() + DISCOVERY_RECHECK_SECONDS, reason)
+        return self.async_abort(reason=reason)
+
+    async def async_step_discovery_confirm(self, user_input=None):
+        serial = self._serial
+        if user_input is not None:
+            model = user_input[CONF_MODEL]
+            return self.async_create_entry(
+                title=f"Teknix {model} ({serial})",
+                data={CONF_SERIAL: serial, CONF_MODEL: model},
+            )
+
+        schema = vol.Schema({
+            vol.Required(CONF_MODEL, default=self._models[0]): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=self._models,
+                    translation_key="model"
+                )
+            ),
+        })
+        return self.async_show_form(
+            step_id="discovery_confirm",
+            data_schema=schema,
+            description_placeholders={"serial": serial},
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -39,7 +141,83 @@ class TeknixOptionsFlow(config_entries.OptionsFlow):
         self.entry = entry
 
     async def async_step_init(self, user_input=None):
-        return await self.async_step_user(user_input)
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.entry.options
+        schema = vol.Schema({
+            vol.Required(
+                CONF_SAVE_DELAY,
+                default=options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY_SECONDS),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=600, step=1, unit_of_measurement="s",
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Required(
+                CONF_TEMP_DEADBAND,
+                default=options.get(CONF_TEMP_DEADBAND, DEFAULT_TEMP_DEADBAND),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=5, step=0.1, unit_of_measurement="°C",
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Required(
+                CONF_TEMP_MIN_INTERVAL,
+                default=options.get(CONF_TEMP_MIN_INTERVAL, DEFAULT_TEMP_MIN_INTERVAL_SECONDS),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=3600, step=1, unit_of_measurement="s",
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Required(
+                CONF_TEMP_MAX_INTERVAL,
+                default=options.get(CONF_TEMP_MAX_INTERVAL, DEFAULT_TEMP_MAX_INTERVAL_SECONDS),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=86400, step=1, unit_of_measurement="s",
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            ),
+            # power limiter: off unless both the sensor and the limit are set
+            vol.Optional(
+                CONF_LIMIT_SENSOR,
+                description={"suggested_value": options.get(CONF_LIMIT_SENSOR)},
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(domain="sensor", device_class="power")
+            ),
+            vol.Optional(
+                CONF_LIMIT_POWER,
+                description={"suggested_value": options.get(CONF_LIMIT_POWER)},
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=100, step=0.1, unit_of_measurement="kW",
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Required(
+                CONF_LIMIT_HYSTERESIS,
+                default=options.get(CONF_LIMIT_HYSTERESIS, DEFAULT_LIMIT_HYSTERESIS_KW),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=0, max=20, step=0.1, unit_of_measurement="kW",
+                    mode=selector.NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Required(
+                CONF_BUDGET_PRIORITY,
+                default=options.get(CONF_BUDGET_PRIORITY, DEFAULT_BUDGET_PRIORITY),
+            ): selector.NumberSelector(
+                selector.NumberSelectorConfig(
+                    min=1, max=10, step=1,
+                    mode=selector.NumberSelectorMode.SLIDER,
+                )
+            ),
+        })
+        return self.async_show_form(step_id="init", data_schema=schema)
 
     async def async_step_user(self, user_input=None):
-        return self.async_create_entry(title="", data=user_input)
\ No newline at end of file
+        return await self.async_step_init(user_input)
\ No newline at end of file
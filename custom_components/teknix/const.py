@@ -1,26 +1,158 @@
 from homeassistant.const import Platform
+from .fields import CORE_FIELDS
 DOMAIN = "teknix"
 
 CONF_SERIAL = "serial_number"
 CONF_MODEL  = "model"
+CONF_SAVE_DELAY = "save_delay"
+CONF_TEMP_DEADBAND = "temp_deadband"
+CONF_TEMP_MIN_INTERVAL = "temp_min_interval"
+CONF_TEMP_MAX_INTERVAL = "temp_max_interval"
+CONF_LIMIT_SENSOR = "limit_power_sensor"
+CONF_LIMIT_POWER = "limit_max_power"
+CONF_LIMIT_HYSTERESIS = "limit_hysteresis"
+CONF_BUDGET_PRIORITY = "budget_priority"
 
 PLATFORMS = [Platform.SENSOR, Platform.SWITCH, Platform.NUMBER]
 
 DISPATCH_SIGNAL = f"{DOMAIN}_update"
 
+# hass.data[DOMAIN] key of the shared TeknixRouter (other keys are entry ids)
+DATA_ROUTER = "router"
+# hass.data[DOMAIN] key of the shared PowerBudgetAllocator
+DATA_ALLOCATOR = "allocator"
+# hass.data[DOMAIN] key of the shared PollWheel
+DATA_POLL_WHEEL = "poll_wheel"
+# hass.data[DOMAIN] key of the MQTT discovery verdicts: serial -> (expiry, abort reason)
+DATA_DISCOVERY_CHECKED = "discovery_checked"
+
+# Until the first heater is set up every message on the discovery topic starts a
+# config flow; a device that was checked once is answered from the cache for this long
+DISCOVERY_RECHECK_SECONDS = 600
+
+# Keys computed from other state keys; listeners of a derived key are notified
+# whenever any of its inputs change.
+DERIVED_KEYS = {
+    "current_consumption": (
+        "house_heating_active",
+        "tank_heating_active",
+        "house_heating_step",
+        "tank_heating_step",
+    ),
+}
+
+# Listeners of this key are notified whenever the hub's availability changes
+AVAILABLE_KEY = "available"
+
 # INFO command interval in minutes
 INFO_COMMAND_INTERVAL_MINUTES = 1
 
 # PO1800NG command interval in minutes
 PO1800NG_COMMAND_INTERVAL_MINUTES = 3
 
+# Poll scheduler tick; polls are due on multiples of it
+POLL_TICK_SECONDS = 5
+
+# The shared poll wheel fires this often and ticks a different group of hubs
+# each time, so every hub is still ticked every POLL_TICK_SECONDS
+POLL_WHEEL_TICK_SECONDS = 1
+# Hubs sending their first polls per wheel tick at startup
+POLL_STARTUP_PER_TICK = 2
+# Share of the poll interval a hub's phase is jittered by, from its serial
+POLL_PHASE_JITTER = 0.05
+
+# Unanswered polls back off exponentially up to this interval
+POLL_MAX_INTERVAL_MINUTES = 15
+
+# INFO is polled faster for a short while after a user command
+POLL_BOOST_INTERVAL_SECONDS = 10
+POLL_BOOST_DURATION_SECONDS = 60
+
+def dispatch_signal(entry_id: str, key: str) -> str:
+    return f"{DISPATCH_SIGNAL}_{entry_id}_{key}"
+
+# Persisted state is written at most once per this many seconds (options: save_delay)
+DEFAULT_SAVE_DELAY_SECONDS = 30
+
+# Measured temperature sensors write a new state only for changes of at least the
+# deadband (°C), no more often than the min interval, and at least every max interval (s)
+DEFAULT_TEMP_DEADBAND = 0.3
+DEFAULT_TEMP_MIN_INTERVAL_SECONDS = 30
+DEFAULT_TEMP_MAX_INTERVAL_SECONDS = 600
+
+# State keys that change on every frame and are not worth persisting
+VOLATILE_STATE_KEYS = frozenset({"raw"})
+
+# Minimum spacing between commands published to the heater's serial line
+COMMAND_MIN_INTERVAL_SECONDS = 1.0
+
+# Command queue slot shared by house and tank steps (one power command sets both)
+POWER_STEP_SLOT = "power_step"
+
+# How long telemetry that contradicts a just-sent command is ignored
+PENDING_TTL_SECONDS = 2.0
+
+# A sent command is resent if no INFO frame confirms it within this time,
+# and fails after COMMAND_MAX_ATTEMPTS sends
+COMMAND_CONFIRM_TIMEOUT_SECONDS = 5.0
+COMMAND_MAX_ATTEMPTS = 3
+
+# The heater counts as offline after its LWT says Offline, while the broker is
+# disconnected, or when no INFO frame arrived for this long
+OFFLINE_FRAME_AGE_SECONDS = 3 * INFO_COMMAND_INTERVAL_MINUTES * 60
+# Control requests held while offline (the latest one per slot; there are 6 slots)
+OFFLINE_BUFFER_SIZE = 8
+
+# Power limiter (options: limit_*): the site power sensor must stay below the limit (kW);
+# steps are restored once the sensor is hysteresis kW below it for the restore delay
+DEFAULT_LIMIT_HYSTERESIS_KW = 1.0
+LIMITER_RESTORE_DELAY_SECONDS = 30
+# after a cut the meter still shows the old heater power for a while
+LIMITER_SETTLE_SECONDS = 10
+# sensor update -> step command published; the command only waits for serial pacing
+LIMITER_REACTION_BOUND_SECONDS = COMMAND_MIN_INTERVAL_SECONDS + 0.5
+
+# Energy meter: gaps between frames are counted at most this long,
+# and the total is published with this many decimals (kWh)
+ENERGY_MAX_GAP_SECONDS = 900
+ENERGY_PRECISION = 2
+
+# In-memory history of raw INFO frames, per device:
+# 240 rows * (256 + 10) bytes = 63,840 bytes (~62 KiB)
+FRAME_HISTORY_SIZE = 240
+FRAME_HISTORY_ROW_BYTES = 256
+
+SERVICE_DUMP_FRAME_HISTORY = "dump_frame_history"
+SERVICE_APPLY_PROFILE = "apply_profile"
+SERVICE_SET_POWER_BUDGET = "set_power_budget"
+
+# Shared power budget (teknix.set_power_budget): heaters with a higher
+# priority (options: budget_priority) get their steps first
+DEFAULT_BUDGET_PRIORITY = 5
+
 # MQTT topics (derived from serial)
+DEVICE_TOPIC_PREFIX = "tasmota_"
+
+def device_topic(serial: str) -> str:
+    return f"{DEVICE_TOPIC_PREFIX}{serial}"
+
+def device_serial(device: str) -> str | None:
+    """Serial from a device topic level (tasmota_<serial>), or None for other devices."""
+    if not device.startswith(DEVICE_TOPIC_PREFIX) or len(device) == len(DEVICE_TOPIC_PREFIX):
+        return None
+    return device[len(DEVICE_TOPIC_PREFIX):]
+
 def cmd_topic(serial: str) -> str:
-    return f"cmnd/tasmota_{serial}/SerialSend"
+    return f"cmnd/{device_topic(serial)}/SerialSend"
+
+# tele topics the hub consumes: SerialReceived frames arrive on RESULT,
+# Tasmota's last will (Online/Offline) on LWT
+TELE_RESULT = "RESULT"
+TELE_LWT = "LWT"
 
-def tele_topic(serial: str) -> str:
-    # wildcard, we subscribe to all tele from that device
-    return f"tele/tasmota_{serial}/#"
+def tele_topic(leaf: str, device: str = "+") -> str:
+    # "+" matches every device; the router picks the hub from the topic
+    return f"tele/{device}/{leaf}"
 
 MODELS = {
     "ESPRO 4.5": {"elements_count": 3, "element_kw": 1.50},
@@ -45,14 +177,5 @@ def model_element_kw(model_name: str) -> float:
     m = MODELS[model_name]
     return float(m["element_kw"])
 
-IDX = {
-    "boiler_power_state": 0,
-    "house_target_temp": 1,
-    "tank_target_temp": 8,
-    "house_heating_active": 11,
-    "tank_heating_active": 12,
-    "house_heating_step": 18,
-    "tank_heating_step": 19,
-    "house_loop_temp": 38,   # /10
-    "tank_water_temp": 39,   # /10
-}
\ No newline at end of file
+# Frame positions of the core INFO fields (the full table is in fields.py)
+IDX = {f.key: f.index for f in CORE_FIELDS}
\ No newline at end of file
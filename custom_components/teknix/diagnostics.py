@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .allocator import async_get_allocator
+from .const import DOMAIN, VOLATILE_STATE_KEYS
+from .poll_wheel import async_get_poll_wheel
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    hub = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "model": hub.model,
+        "frame_layout": None if hub.layout is None else hub.layout.name,
+        "online": hub.online,
+        "offline": hub.offline_diagnostics(),
+        "state": {k: v for k, v in hub.state.as_dict().items() if k not in VOLATILE_STATE_KEYS},
+        "state_version": hub.state.version,
+        "suppressed_writes": hub.suppressed_writes,
+        "polling": hub.poll_diagnostics(),
+        "poll_wheel": async_get_poll_wheel(hass).as_dict(),
+        "commands": hub.command_diagnostics(),
+        "metrics": hub.metrics_diagnostics(),
+        "power_limiter": hub.limiter_diagnostics(),
+        "power_budget": async_get_allocator(hass).as_dict(),
+        "frame_history": hub.history_diagnostics(),
+    }
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Union
+
+if TYPE_CHECKING:
+    from .state import TeknixState
+
+
+def compute_power_kw(state: Union[TeknixState, Mapping[str, Any]], step_max: int, element_kw: float) -> float:
+    """Instantaneous power (kW) from the active modes and heating steps of a state or decoded frame."""
+    if element_kw <= 0:
+        return 0.0
+
+    house_active = bool(state.get("house_heating_active"))
+    tank_active = bool(state.get("tank_heating_active"))
+
+    house_step = max(0, min(state.get("house_heating_step") or 0, step_max))
+    tank_step = max(0, min(state.get("tank_heating_step") or 0, step_max))
+
+    if tank_active and not house_active:
+        step = tank_step
+    elif house_active and not tank_active:
+        step = house_step
+    elif house_active and tank_active:
+        step = max(house_step, tank_step)
+    else:
+        step = 0
+
+    return round(step * element_kw, 2)
+
+
+class EnergyMeter:
+    """Integrate power into kWh, piecewise constant between updates.
+
+    Uses monotonic time; gaps longer than max_gap (device silent, HA restart)
+    are only counted up to max_gap, and nothing is integrated before the first
+    update after a restart.
+    """
+
+    def __init__(self, total_kwh: float = 0.0, max_gap: float = 900.0):
+        self.total_kwh = float(total_kwh)
+        self._max_gap = float(max_gap)
+        self._power_kw: Optional[float] = None
+        self._since: Optional[float] = None
+
+    def update(self, power_kw: float, now: float) -> float:
+        if self._power_kw and self._since is not None:
+            elapsed = min(max(0.0, now - self._since), self._max_gap)
+            self.total_kwh += self._power_kw * elapsed / 3600.0
+        self._power_kw = power_kw
+        self._since = now
+        return self.total_kwh
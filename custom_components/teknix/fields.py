@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Mapping, Optional, Tuple
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import UnitOfTemperature
+
+# Integers in an INFO frame (I<v0>&<v1>&...&<v39>Z)
+INFO_FRAME_LENGTH = 40
+
+
+@dataclass(frozen=True)
+class InfoField:
+    """One integer position of the INFO frame and how to present it.
+
+    The decoded value is kind(raw * scale); raw values outside lo..hi reject
+    the whole frame. Core fields are always decoded because entities and
+    logic depend on them. Every other field gets a disabled-by-default sensor
+    named by translation_key (entity.sensor.<key> in translations), or
+    "INFO position N" if its meaning is unknown, and is only decoded while
+    that sensor is enabled.
+    """
+
+    key: str
+    index: int
+    kind: type = int
+    scale: float = 1.0
+    lo: Optional[int] = None
+    hi: Optional[int] = None
+    unit: Optional[str] = None
+    device_class: Optional[SensorDeviceClass] = None
+    core: bool = False
+    translation_key: Optional[str] = None
+
+    def decode(self, raw: int):
+        if self.kind is bool:
+            return raw != 0
+        if self.scale != 1.0:
+            return round(raw * self.scale, 1)
+        return raw
+
+
+_CORE_FIELDS = (
+    InfoField("boiler_power_state", 0, bool, lo=0, hi=1, core=True),
+    InfoField(
+        "house_target_temp", 1, lo=0, hi=99,
+        unit=UnitOfTemperature.CELSIUS, device_class=SensorDeviceClass.TEMPERATURE, core=True,
+    ),
+    InfoField(
+        "tank_target_temp", 8, lo=0, hi=99,
+        unit=UnitOfTemperature.CELSIUS, device_class=SensorDeviceClass.TEMPERATURE, core=True,
+    ),
+    InfoField("house_heating_active", 11, bool, lo=0, hi=1, core=True),
+    InfoField("tank_heating_active", 12, bool, lo=0, hi=1, core=True),
+    InfoField("house_heating_step", 18, lo=0, hi=9, core=True),
+    InfoField("tank_heating_step", 19, lo=0, hi=9, core=True),
+    # tenths of °C
+    InfoField(
+        "house_loop_temp", 38, float, 0.1, lo=-400, hi=1500,
+        unit=UnitOfTemperature.CELSIUS, device_class=SensorDeviceClass.TEMPERATURE, core=True,
+    ),
+    InfoField(
+        "tank_water_temp", 39, float, 0.1, lo=-400, hi=1500,
+        unit=UnitOfTemperature.CELSIUS, device_class=SensorDeviceClass.TEMPERATURE, core=True,
+    ),
+)
+
+# Further positions with a known meaning; each needs a translation_key (with
+# names in en.json and uk.json), a unit and a device class
+_KNOWN_FIELDS: Tuple[InfoField, ...] = ()
+
+_KNOWN_INDEXES = {f.index for f in (*_CORE_FIELDS, *_KNOWN_FIELDS)}
+
+# Every other position is exposed as a raw integer, so it can be watched (and
+# described above once understood) without reading raw frames
+INFO_FIELDS: Tuple[InfoField, ...] = tuple(sorted(
+    (
+        *_CORE_FIELDS,
+        *_KNOWN_FIELDS,
+        *(InfoField(f"info_{i:02d}", i) for i in range(INFO_FRAME_LENGTH) if i not in _KNOWN_INDEXES),
+    ),
+    key=lambda f: f.index,
+))
+
+FIELDS_BY_KEY: Mapping[str, InfoField] = MappingProxyType({f.key: f for f in INFO_FIELDS})
+CORE_FIELDS: Tuple[InfoField, ...] = tuple(f for f in INFO_FIELDS if f.core)
+OPTIONAL_FIELDS: Tuple[InfoField, ...] = tuple(f for f in INFO_FIELDS if not f.core)
+OPTIONAL_FIELD_KEYS = frozenset(f.key for f in OPTIONAL_FIELDS)
+
+
+@dataclass(frozen=True, eq=False)
+class FrameLayout:
+    """Where the INFO fields sit in the frames of one model/firmware family.
+
+    A layout matches frames of at least length integers from the listed
+    models (any model if None); the longest matching layout wins. The
+    detected layout is reported in diagnostics (frame_layout).
+    """
+
+    name: str
+    length: int
+    idx_map: Mapping[str, int]
+    models: Optional[FrozenSet[str]] = None
+
+
+# Only the layout below has been seen in the field; add variants here
+FRAME_LAYOUTS: Tuple[FrameLayout, ...] = (
+    FrameLayout(
+        name="info40",
+        length=INFO_FRAME_LENGTH,
+        idx_map=MappingProxyType({f.key: f.index for f in INFO_FIELDS}),
+    ),
+)
+
+
+def find_layout(model: str, length: int) -> Optional[FrameLayout]:
+    """Return the layout for a model's frames of length integers, or None."""
+    best = None
+    for layout in FRAME_LAYOUTS:
+        if length < layout.length or (layout.models is not None and model not in layout.models):
+            continue
+        if best is None or layout.length > best.length:
+            best = layout
+    return best
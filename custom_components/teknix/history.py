@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, List
+
+from .parser import frame_values
+
+
+class FrameHistory:
+    """Bounded ring buffer of the last INFO frames.
+
+    Frames are kept as raw bytes in one preallocated bytearray of fixed-width rows,
+    so recording a frame is a single copy with no int conversion; values are only
+    decoded on export. Memory is fixed at capacity * (row_bytes + 10) bytes
+    (row, 8-byte monotonic timestamp, 2-byte length); frames longer than a row
+    are stored truncated.
+    """
+
+    def __init__(self, capacity: int, row_bytes: int):
+        self.capacity = max(1, int(capacity))
+        self.row_bytes = max(8, int(row_bytes))
+        self._rows = bytearray(self.capacity * self.row_bytes)
+        self._lengths = array("H", bytes(2 * self.capacity))
+        self._times = array("d", bytes(8 * self.capacity))
+        self._next = 0
+        self._count = 0
+        self.truncated = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._rows) + self._lengths.itemsize * self.capacity + self._times.itemsize * self.capacity
+
+    def append(self, raw: bytes, timestamp: float) -> None:
+        i = self._next
+        n = len(raw)
+        if n > self.row_bytes:
+            n = self.row_bytes
+            self.truncated += 1
+        start = i * self.row_bytes
+        self._rows[start:start + n] = raw[:n]
+        self._lengths[i] = n
+        self._times[i] = timestamp
+        self._next = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def as_list(self, now: float) -> List[Dict[str, Any]]:
+        """Return frames oldest first, with their age and decoded values."""
+        frames = []
+        first = (self._next - self._count) % self.capacity
+        for k in range(self._count):
+            i = (first + k) % self.capacity
+            start = i * self.row_bytes
+            n = self._lengths[i]
+            raw = bytes(self._rows[start:start + n])
+            truncated = n == self.row_bytes and raw[-1:] != b"Z"
+            if truncated:
+                # keep the complete tokens only
+                raw = raw[:raw.rfind(b"&")] + b"Z"
+            frames.append({
+                "age_s": round(now - self._times[i], 1),
+                "values": frame_values(raw),
+                "truncated": truncated,
+            })
+        return frames
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "row_bytes": self.row_bytes,
+            "memory_bytes": self.nbytes,
+            "truncated": self.truncated,
+            "frames": self.as_list(now),
+        }
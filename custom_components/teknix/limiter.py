@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfPower
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import PowerConverter
+
+from .command_queue import TeknixCommandHeld
+from .commands import build_power_command
+from .const import (
+    POWER_STEP_SLOT,
+    LIMITER_RESTORE_DELAY_SECONDS,
+    LIMITER_SETTLE_SECONDS,
+    LIMITER_REACTION_BOUND_SECONDS,
+)
+from .energy import compute_power_kw
+from .metrics import Timing
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PowerLimiter:
+    """Keep a site power sensor below a limit by lowering the heater's steps.
+
+    Every sensor update recomputes the highest step that fits: the sensor minus
+    the heater's own draw is the rest of the site, and (limit_kw - rest) /
+    element_kw, rounded down, is the step cap. Steps above it are cut at once
+    with an urgent power command. The steps from before the first cut are restored
+    (as far as they fit) once the sensor is hysteresis_kw below the limit and
+    restore_delay has passed since the last change.
+
+    Right after a cut the sensor still includes the old heater power, so for
+    settle seconds the heater is counted at its pre-cut draw.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub,
+        entity_id: str,
+        limit_kw: float,
+        hysteresis_kw: float,
+        restore_delay: float = LIMITER_RESTORE_DELAY_SECONDS,
+        settle: float = LIMITER_SETTLE_SECONDS,
+        reaction_bound: float = LIMITER_REACTION_BOUND_SECONDS,
+    ):
+        self.hass = hass
+        self._hub = hub
+        self.entity_id = entity_id
+        self.limit_kw = float(limit_kw)
+        self.hysteresis_kw = max(0.0, float(hysteresis_kw))
+        self._restore_delay = float(restore_delay)
+        self._settle = float(settle)
+        self.reaction_bound = float(reaction_bound)
+
+        # steps to go back to; None while not limiting
+        self._restore: Optional[Tuple[int, int]] = None
+        self._last_change = 0.0
+        self._settle_until = 0.0
+        self._settle_kw = 0.0
+        self._at_minimum = False
+        self._unsub = None
+
+        self.site_kw: Optional[float] = None
+        self.cuts = 0
+        self.restores = 0
+        self.over_bound = 0
+        # sensor update -> cut command published
+        self.reaction = Timing()
+
+    @property
+    def limiting(self) -> bool:
+        return self._restore is not None
+
+    @callback
+    def async_start(self) -> None:
+        self._unsub = async_track_state_change_event(
+            self.hass, [self.entity_id], self._async_sensor_changed
+        )
+        state = self.hass.states.get(self.entity_id)
+        if state is not None:
+            self._async_evaluate(state, time.monotonic())
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_sensor_changed(self, event: Event) -> None:
+        new_state = event.data.get("new_state")
+        if new_state is None:
+            return
+        # count the reaction from the moment the sensor state was written
+        age = (dt_util.utcnow() - new_state.last_updated).total_seconds()
+        self._async_evaluate(new_state, time.monotonic() - max(0.0, age))
+
+    @staticmethod
+    def _power_kw(state: State) -> Optional[float]:
+        try:
+            value = float(state.state)
+        except ValueError:
+            return None
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT, UnitOfPower.WATT)
+        try:
+            return PowerConverter.convert(value, unit, UnitOfPower.KILO_WATT)
+        except HomeAssistantError:
+            return None
+
+    @callback
+    def _async_evaluate(self, sensor_state: State, observed_at: float) -> None:
+        site_kw = self._power_kw(sensor_state)
+        if site_kw is None:
+            return
+        self.site_kw = site_kw
+
+        hub = self._hub
+        state = hub.state
+        step_max = hub.step_max
+        element_kw = hub.element_kw
+        if element_kw <= 0:
+            return
+
+        now = time.monotonic()
+        heater_kw = compute_power_kw(state, step_max, element_kw)
+        metered_kw = max(heater_kw, self._settle_kw) if now < self._settle_until else heater_kw
+        rest_kw = site_kw - metered_kw
+
+        house = max(1, min(state.house_heating_step or 1, step_max))
+        tank = max(1, min(state.tank_heating_step or 1, step_max))
+
+        cap = max(1, int((self.limit_kw - rest_kw) / element_kw + 1e-9))
+        cut = (min(house, cap), min(tank, cap))
+        cut_state, _ = state.evolve({"house_heating_step": cut[0], "tank_heating_step": cut[1]})
+        if compute_power_kw(cut_state, step_max, element_kw) < heater_kw:
+            if self._restore is None:
+                self._restore = (house, tank)
+            self._settle_kw = metered_kw
+            self._settle_until = now + self._settle
+            self._last_change = now
+            self.cuts += 1
+            _LOGGER.info(
+                "Teknix %s: site power %.2f kW over %.2f kW limit, steps %s -> %s",
+                hub.serial, site_kw, self.limit_kw, (house, tank), cut,
+            )
+            self._async_send(cut, urgent=True, observed_at=observed_at)
+            return
+
+        over = site_kw > self.limit_kw and cap == 1
+        if over and not self._at_minimum:
+            _LOGGER.warning(
+                "Teknix %s: site power %.2f kW is over the %.2f kW limit at the lowest step",
+                hub.serial, site_kw, self.limit_kw,
+            )
+        self._at_minimum = over
+
+        if self._restore is None or now - self._last_change < self._restore_delay:
+            return
+        up_cap = int((self.limit_kw - self.hysteresis_kw - rest_kw) / element_kw + 1e-9)
+        restore_house, restore_tank = self._restore
+        target = (max(house, min(restore_house, up_cap)), max(tank, min(restore_tank, up_cap)))
+        if target == self._restore:
+            self._restore = None
+        if target != (house, tank):
+            self._last_change = now
+            self.restores += 1
+            _LOGGER.info("Teknix %s: restoring steps %s -> %s", hub.serial, (house, tank), target)
+            self._async_send(target, urgent=False, observed_at=observed_at)
+
+    @callback
+    def _async_send(self, steps: Tuple[int, int], urgent: bool, observed_at: float) -> None:
+        house, tank = steps
+        future = self._hub.async_request(
+            POWER_STEP_SLOT,
+            build_power_command(house, tank),
+            {"house_heating_step": house, "tank_heating_step": tank},
+            urgent=urgent,
+            on_sent=partial(self._async_reacted, observed_at) if urgent else None,
+        )
+        future.add_done_callback(self._command_done)
+
+    @callback
+    def _async_reacted(self, observed_at: float) -> None:
+        latency = time.monotonic() - observed_at
+        self.reaction.add(latency)
+        if latency > self.reaction_bound:
+            self.over_bound += 1
+            _LOGGER.warning(
+                "Teknix %s: power limit reaction took %.2f s (bound %.2f s)",
+                self._hub.serial, latency, self.reaction_bound,
+            )
+
+    def _command_done(self, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is None:
+            return
+        if isinstance(future.exception(), TeknixCommandHeld):
+            # replayed on reconnect; the hub already warned about the outage
+            _LOGGER.debug("Teknix %s: power limiter command held: %s", self._hub.serial, future.exception())
+        else:
+            _LOGGER.warning("Teknix %s: power limiter command failed: %s", self._hub.serial, future.exception())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sensor": self.entity_id,
+            "limit_kw": self.limit_kw,
+            "hysteresis_kw": self.hysteresis_kw,
+            "site_kw": self.site_kw,
+            "limiting": self.limiting,
+            "restore_steps": self._restore,
+            "cuts": self.cuts,
+            "restores": self.restores,
+            "reaction_bound_s": self.reaction_bound,
+            "reactions_over_bound": self.over_bound,
+            "reaction": self.reaction.as_dict(),
+        }
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict
+
+from homeassistant.core import callback
+
+# Timing histograms kept per hub
+TIMING_PARSE = "parse"
+TIMING_MERGE = "merge"
+TIMING_DISPATCH = "dispatch"
+TIMING_COMMAND_ROUND_TRIP = "command_round_trip"
+TIMINGS = (TIMING_PARSE, TIMING_MERGE, TIMING_DISPATCH, TIMING_COMMAND_ROUND_TRIP)
+
+# Bucket i counts durations in [2**(i-1), 2**i) µs; the last one is open-ended (> ~33 s)
+_BUCKETS = 27
+
+
+class Timing:
+    """Latency histogram with fixed power-of-two microsecond buckets."""
+
+    __slots__ = ("count", "total", "max", "_buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = array("L", bytes(array("L").itemsize * _BUCKETS))
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._buckets[min(int(seconds * 1e6).bit_length(), _BUCKETS - 1)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound (s) of the bucket holding the pct-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = self.count * pct / 100.0
+        seen = 0
+        for i, n in enumerate(self._buckets):
+            seen += n
+            if seen >= rank:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean * 1e3, 3),
+            "p50_ms": round(self.percentile(50) * 1e3, 3),
+            "p95_ms": round(self.percentile(95) * 1e3, 3),
+            "max_ms": round(self.max * 1e3, 3),
+            # upper bucket bound in µs -> count, non-empty buckets only
+            "histogram_us": {str(1 << i): n for i, n in enumerate(self._buckets) if n},
+        }
+
+
+class HubMetrics:
+    """Hot-path counters and timings of one hub.
+
+    Counters are plain integer increments and always on. Timings need two
+    perf_counter() calls per measurement, so they are only taken while timing
+    is enabled (by the timing diagnostic sensors); otherwise the hot path pays
+    a single attribute check.
+    """
+
+    def __init__(self):
+        self.frames_received = 0
+        self.frames_parsed = 0
+        self.frames_rejected: Dict[str, int] = {}
+        self.frames_suppressed = 0
+        # identical repeats of the previous frame, not decoded again
+        self.frames_duplicate = 0
+        self.store_saves = 0
+
+        self.timing = False
+        self._timing_users = 0
+        self.timings = {name: Timing() for name in TIMINGS}
+        self.parse = self.timings[TIMING_PARSE]
+        self.merge = self.timings[TIMING_MERGE]
+        self.dispatch = self.timings[TIMING_DISPATCH]
+        self.command_round_trip = self.timings[TIMING_COMMAND_ROUND_TRIP]
+
+    def rejected(self, reason: str) -> None:
+        self.frames_rejected[reason] = self.frames_rejected.get(reason, 0) + 1
+
+    @callback
+    def async_enable_timing(self) -> None:
+        self._timing_users += 1
+        self.timing = True
+
+    @callback
+    def async_disable_timing(self) -> None:
+        self._timing_users = max(0, self._timing_users - 1)
+        self.timing = self._timing_users > 0
+
+    @callback
+    def command_confirmed(self, seconds: float) -> None:
+        if self.timing:
+            self.command_round_trip.add(seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "frames_received": self.frames_received,
+            "frames_parsed": self.frames_parsed,
+            "frames_rejected": sum(self.frames_rejected.values()),
+            "frames_rejected_by_reason": dict(self.frames_rejected),
+            "frames_suppressed": self.frames_suppressed,
+            "frames_duplicate": self.frames_duplicate,
+            "store_saves": self.store_saves,
+            "timing_enabled": self.timing,
+            "timings": {name: timing.as_dict() for name, timing in self.timings.items()},
+        }
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.const import UnitOfTemperature
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo
 
-from .const import DOMAIN
+from .const import DOMAIN, POWER_STEP_SLOT, AVAILABLE_KEY
 from .commands import (
     build_power_command,
     build_house_temp_command,
@@ -53,11 +54,14 @@ async def async_setup_entry(hass, entry, async_add_entities):
 class BaseTeknixNumber(NumberEntity):
     _attr_has_entity_name = True
     _attr_mode = NumberMode.BOX
+    _attr_should_poll = False
 
     def __init__(self, hub, entry_id: str, key: str, translation_key: str):
         self._hub = hub
         self._entry_id = entry_id
         self._key = key
+        self._unsub = None
+        self._unsub_available = None
         self._attr_translation_key = translation_key
         self._attr_unique_id = f"{DOMAIN}:{entry_id}:num:{key}"
         self._attr_device_info = DeviceInfo(
@@ -68,6 +72,26 @@ class BaseTeknixNumber(NumberEntity):
             sw_version=getattr(self._hub, "firmware", None),
         )
 
+    @property
+    def available(self) -> bool:
+        return self._hub.available and bool(self._hub.state)
+
+    async def async_added_to_hass(self):
+        self._unsub = self._hub.async_subscribe(self._key, self._handle_state)
+        self._unsub_available = self._hub.async_subscribe(AVAILABLE_KEY, self._handle_state)
+
+    async def async_will_remove_from_hass(self):
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+        if self._unsub_available:
+            self._unsub_available()
+            self._unsub_available = None
+
+    @callback
+    def _handle_state(self):
+        self.async_write_ha_state()
+
 
 class TeknixTargetTempNumber(BaseTeknixNumber):
     _attr_unit_of_measurement = UnitOfTemperature.CELSIUS
@@ -78,7 +102,6 @@ class TeknixTargetTempNumber(BaseTeknixNumber):
         self._min = cfg["min"]
         self._max = cfg["max"]
         self._step = cfg["step"]
-        self._hub.state.setdefault(self._key, self._min)
 
     @property
     def native_min_value(self) -> float:
@@ -94,7 +117,8 @@ class TeknixTargetTempNumber(BaseTeknixNumber):
 
     @property
     def native_value(self):
-        return int(self._hub.state.get(self._key, self._min))
+        value = getattr(self._hub.state, self._key)
+        return self._min if value is None else value
 
     async def async_set_native_value(self, value: float) -> None:
         t = int(round(value))
@@ -108,20 +132,12 @@ class TeknixTargetTempNumber(BaseTeknixNumber):
         else:
             cmd = build_tank_temp_command(t)
 
-        await self._hub.publish(cmd)
-        # mark this key as pending to suppress racing telemetry for a short time
-        if hasattr(self._hub, "set_pending"):
-            self._hub.set_pending(self._key, t)
-
-        # локально оновлюємо стан (HA потім перепише з телеметрії)
-        self._hub.state[self._key] = t
-        self.async_write_ha_state()
+        await self._hub.async_request(self._key, cmd, {self._key: t})
 
 
 class TeknixPowerStepNumber(BaseTeknixNumber):
     def __init__(self, hub, entry_id: str, cfg: dict):
         super().__init__(hub, entry_id, cfg["key"], cfg["translation_key"])
-        self._hub.state.setdefault(self._key, 1)
 
     @property
     def native_min_value(self) -> float:
@@ -137,12 +153,8 @@ class TeknixPowerStepNumber(BaseTeknixNumber):
 
     @property
     def native_value(self):
-        value = int(self._hub.state.get(self._key, 1))
-        if value > self.native_max_value:
-            value = int(self.native_max_value)
-        if value < 1:
-            value = 1
-        return value
+        value = getattr(self._hub.state, self._key) or 1
+        return max(1, min(value, self._hub.step_max))
 
     async def async_set_native_value(self, value: float) -> None:
         v = int(round(value))
@@ -152,8 +164,9 @@ class TeknixPowerStepNumber(BaseTeknixNumber):
         if v > maxv:
             v = maxv
 
-        house_step = int(self._hub.state.get("house_heating_step", 1))
-        tank_step = int(self._hub.state.get("tank_heating_step", 1))
+        state = self._hub.state
+        house_step = state.house_heating_step or 1
+        tank_step = state.tank_heating_step or 1
 
         if self._key == "house_heating_step":
             house_step = v
@@ -161,15 +174,12 @@ class TeknixPowerStepNumber(BaseTeknixNumber):
             tank_step = v
 
         other_max = maxv
-        house_step = max(1, min(int(house_step), other_max))
-        tank_step = max(1, min(int(tank_step), other_max))
+        house_step = max(1, min(house_step, other_max))
+        tank_step = max(1, min(tank_step, other_max))
 
+        # both steps travel in one command, so they share one queue slot
         cmd = build_power_command(house_step, tank_step)
-        await self._hub.publish(cmd)
-        
-        if hasattr(self._hub, "set_pending"):
-            self._hub.set_pending("house_heating_step", house_step)
-            self._hub.set_pending("tank_heating_step", tank_step)
-
-        self._hub.state[self._key] = v
-        self.async_write_ha_state()
\ No newline at end of file
+        await self._hub.async_request(POWER_STEP_SLOT, cmd, {
+            "house_heating_step": house_step,
+            "tank_heating_step": tank_step,
+        })
\ No newline at end of file
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from typing import Any, Dict, List, Tuple
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+class OfflineBuffer:
+    """Control requests made while the heater is offline, replayed on reconnect.
+
+    Holds the latest (command, values) per control slot, in the order the
+    slots were first requested, and at most size slots (the oldest is dropped).
+    A request that brings a slot back to the reported state removes it, and
+    take() returns only what still differs from state, so nothing stale or
+    already applied is sent after reconnecting.
+    """
+
+    def __init__(self, size: int):
+        self._size = max(1, int(size))
+        self._requests: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+        self.held = 0
+        self.overflowed = 0
+        self.replayed = 0
+        self.reconciled = 0
+
+    def __bool__(self) -> bool:
+        return bool(self._requests)
+
+    def __contains__(self, slot: str) -> bool:
+        return slot in self._requests
+
+    @callback
+    def async_put(self, requests: Iterable[Request], state) -> List[str]:
+        """Hold requests (slot, command, values), replacing earlier ones for the same slot.
+
+        Return the slots held; a request state already reports is not held.
+        """
+        held = []
+        for slot, command, values in requests:
+            if all(state.get(k) == v for k, v in values.items()):
+                # nothing to do once back online
+                self._requests.pop(slot, None)
+                continue
+            if slot not in self._requests and len(self._requests) >= self._size:
+                dropped = next(iter(self._requests))
+                del self._requests[dropped]
+                self.overflowed += 1
+                _LOGGER.warning("Offline buffer full, dropping held %s command", dropped)
+            self._requests[slot] = (command, dict(values))
+            self.held += 1
+            held.append(slot)
+        return held
+
+    @callback
+    def async_take(self, state) -> List[Request]:
+        """Empty the buffer; return the requests whose values state does not report yet."""
+        requests = []
+        for slot, (command, values) in self._requests.items():
+            if all(state.get(k) == v for k, v in values.items()):
+                self.reconciled += 1
+            else:
+                requests.append((slot, command, values))
+        self._requests.clear()
+        self.replayed += len(requests)
+        return requests
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "held_slots": {slot: values for slot, (_, values) in self._requests.items()},
+            "held": self.held,
+            "overflowed": self.overflowed,
+            "replayed": self.replayed,
+            "reconciled": self.reconciled,
+        }
@@ -1,81 +1,200 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Mapping, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
 
+from .codec import FIELD_RANGES
 from .const import IDX
+from .fields import CORE_FIELDS, FIELDS_BY_KEY, FRAME_LAYOUTS, FrameLayout
 
 
 FRAME_PREFIX = "I"
 FRAME_SUFFIX = "Z"
 SERIAL_KEY = "SerialReceived"
 
+_FRAME_PREFIX = FRAME_PREFIX.encode()
+_FRAME_SUFFIX = FRAME_SUFFIX.encode()
+_SERIAL_KEY = f'"{SERIAL_KEY}"'.encode()
 
-def _extract_frame_from_payload(payload: str) -> Optional[str]:
-    p = (payload or "").strip()
-    if not p:
-        return None
+# How each named IDX position is converted (from the fields.py table)
+BOOL_FIELDS = tuple(f.key for f in CORE_FIELDS if f.kind is bool)
+INT_FIELDS = tuple(f.key for f in CORE_FIELDS if f.kind is int)
+DECI_FIELDS = tuple(f.key for f in CORE_FIELDS if f.kind is float)  # value / 10, in °C
 
-    if p.startswith(FRAME_PREFIX) and p.endswith(FRAME_SUFFIX):
-        return p
+Payload = Union[bytes, bytearray, memoryview, str]
 
-    try:
-        obj = json.loads(p)
-    except json.JSONDecodeError:
-        return None
+# FrameError reasons
+REJECT_NON_FRAME = "non_frame"
+REJECT_TOO_SHORT = "too_short"
+REJECT_NON_INTEGER = "non_integer"
+REJECT_OUT_OF_RANGE = "out_of_range"
+REJECT_UNKNOWN_LAYOUT = "unknown_layout"
 
-    val = obj.get(SERIAL_KEY)
-    if isinstance(val, str) and val.startswith(FRAME_PREFIX) and val.endswith(FRAME_SUFFIX):
-        return val
 
-    return None
+class FrameError(ValueError):
+    """A payload that is not a usable INFO frame; reason is one of REJECT_*."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _as_bytes(payload: Payload) -> bytes:
+    if isinstance(payload, str):
+        return payload.encode("utf-8", "ignore")
+    if isinstance(payload, memoryview):
+        return payload.tobytes()
+    return payload or b""
 
 
-def parse_info_message(payload: str, *, strict: bool = False) -> Optional[Dict[str, Any]]:
-    frame = _extract_frame_from_payload(payload)
-    if not frame:
+def extract_frame(payload: Payload) -> Optional[bytes]:
+    """Return the raw b"I...Z" frame from a bare frame or a SerialReceived JSON payload.
+
+    The JSON payload is scanned for the SerialReceived value instead of being parsed.
+    """
+    p = _as_bytes(payload)
+
+    key = p.find(_SERIAL_KEY)
+    if key < 0:
+        p = p.strip()
+        if p[:1] == _FRAME_PREFIX and p[-1:] == _FRAME_SUFFIX:
+            return p
+        return None
+
+    value_start = key + len(_SERIAL_KEY)
+    open_quote = p.find(b'"', value_start)
+    if open_quote < 0 or p[value_start:open_quote].strip() != b":":
         return None
-    try:
-        return parse_info_frame(frame)
-    except ValueError:
-        # Silently ignore invalid frames to avoid error logs
+    close_quote = p.find(b'"', open_quote + 1)
+    if close_quote < 0:
         return None
 
+    frame = p[open_quote + 1:close_quote]
+    if frame[:1] == _FRAME_PREFIX and frame[-1:] == _FRAME_SUFFIX:
+        return frame
+    return None
+
 
-def parse_info_frame(frame: str, *, idx_map: Mapping[str, int] = IDX) -> Dict[str, Any]:
-    if not (frame and frame[0] == FRAME_PREFIX and frame[-1] == FRAME_SUFFIX):
-        raise ValueError("Invalid frame: must start with 'I' and end with 'Z'.")
-
-    parts = frame[1:-1].split("&")
-    try:
-        vals: List[int] = [int(x) for x in parts]
-    except ValueError:
-        # Silently ignore frames with non-integer tokens
-        raise ValueError("Non-integer token in frame")
-
-    if not idx_map:
-        raise ValueError("IDX mapping is empty.")
-    max_needed = max(idx_map.values())
-    if len(vals) <= max_needed:
-        # Silently ignore frames that are too short
-        raise ValueError("Frame too short")
-
-    def g(name: str, default: int = 0) -> int:
-        idx = idx_map[name]
-        return vals[idx] if 0 <= idx < len(vals) else default
-
-    def deci_to_celsius(v: int) -> float:
-        return round(v / 10.0, 1)
-
-    return {
-        "boiler_power_state": bool(g("boiler_power_state")),
-        "house_target_temp": g("house_target_temp"),
-        "tank_target_temp": g("tank_target_temp"),
-        "house_heating_active": bool(g("house_heating_active")),
-        "tank_heating_active": bool(g("tank_heating_active")),
-        "house_heating_step": g("house_heating_step"),
-        "tank_heating_step": g("tank_heating_step"),
-        "house_loop_temp": deci_to_celsius(g("house_loop_temp")),
-        "tank_water_temp": deci_to_celsius(g("tank_water_temp")),
-        "raw": vals,
-    }
\ No newline at end of file
+class InfoFrameDecoder:
+    """INFO frame decoder compiled once from an index map.
+
+    Every decoded position is checked against its codec.FIELD_RANGES domain, so
+    frames corrupted on the serial line are rejected before they reach state.
+    Optional fields (fields.OPTIONAL_FIELDS) are only decoded when listed in
+    extra and present in the index map, and are skipped in frames too short
+    to hold them.
+    """
+
+    __slots__ = ("_idx_map", "_bool", "_int", "_deci", "_extra", "_min_len", "extra")
+
+    def __init__(self, idx_map: Mapping[str, int] = IDX, extra: Iterable[str] = ()):
+        if not idx_map:
+            raise ValueError("IDX mapping is empty.")
+        self._idx_map = idx_map
+        self._bool = tuple((name, idx_map[name], *FIELD_RANGES[name]) for name in BOOL_FIELDS)
+        self._int = tuple((name, idx_map[name], *FIELD_RANGES[name]) for name in INT_FIELDS)
+        self._deci = tuple((name, idx_map[name], *FIELD_RANGES[name]) for name in DECI_FIELDS)
+        self.extra = frozenset(extra)
+        self._extra = tuple(sorted(
+            ((key, idx_map[key], FIELDS_BY_KEY[key]) for key in self.extra if key in idx_map),
+            key=lambda item: item[1],
+        ))
+        self._min_len = max(idx_map[name] for name in (*BOOL_FIELDS, *INT_FIELDS, *DECI_FIELDS)) + 1
+
+    def with_extra(self, extra: Iterable[str]) -> InfoFrameDecoder:
+        """Return a decoder for the same positions that also decodes the extra fields."""
+        extra = frozenset(extra)
+        if extra == self.extra:
+            return self
+        return InfoFrameDecoder(self._idx_map, extra)
+
+    def decode(self, payload: Payload) -> Optional[Dict[str, Any]]:
+        """Decode an MQTT payload; return None if it carries no valid INFO frame."""
+        frame = extract_frame(payload)
+        if not frame:
+            return None
+        try:
+            return self.decode_frame(frame)
+        except ValueError:
+            # Silently ignore invalid frames to avoid error logs
+            return None
+
+    def decode_frame(self, frame: bytes) -> Dict[str, Any]:
+        """Decode a b"I...Z" frame, converting only the positions in the index map.
+
+        The record's "raw" value is the frame itself; see frame_values().
+        Raises FrameError for frames that cannot be decoded.
+        """
+        if not (frame[:1] == _FRAME_PREFIX and frame[-1:] == _FRAME_SUFFIX):
+            raise FrameError(REJECT_NON_FRAME, "Invalid frame: must start with 'I' and end with 'Z'.")
+
+        body = frame[1:-1]
+        tokens = body.split(b"&")
+        if not _is_plain_digits(body):
+            # Signs or whitespace are still valid int() tokens; anything else is not
+            try:
+                for token in tokens:
+                    int(token)
+            except ValueError:
+                raise FrameError(REJECT_NON_INTEGER, "Non-integer token in frame")
+
+        if len(tokens) < self._min_len:
+            raise FrameError(REJECT_TOO_SHORT, "Frame too short")
+
+        record: Dict[str, Any] = {}
+        for name, idx, lo, hi in self._bool:
+            value = int(tokens[idx])
+            if not lo <= value <= hi:
+                raise FrameError(REJECT_OUT_OF_RANGE, f"{name} out of range: {value}")
+            record[name] = value != 0
+        for name, idx, lo, hi in self._int:
+            value = int(tokens[idx])
+            if not lo <= value <= hi:
+                raise FrameError(REJECT_OUT_OF_RANGE, f"{name} out of range: {value}")
+            record[name] = value
+        for name, idx, lo, hi in self._deci:
+            value = int(tokens[idx])
+            if not lo <= value <= hi:
+                raise FrameError(REJECT_OUT_OF_RANGE, f"{name} out of range: {value}")
+            record[name] = round(value / 10.0, 1)
+        for name, idx, field in self._extra:
+            if idx < len(tokens):
+                value = int(tokens[idx])
+                if field.lo is not None and not field.lo <= value <= field.hi:
+                    raise FrameError(REJECT_OUT_OF_RANGE, f"{name} out of range: {value}")
+                record[name] = field.decode(value)
+        record["raw"] = bytes(frame)
+        return record
+
+
+def _is_plain_digits(body: bytes) -> bool:
+    """True if body is '&'-separated unsigned decimal tokens, none empty."""
+    return (
+        body.replace(b"&", b"").isdigit()
+        and b"&&" not in body
+        and body[:1] != b"&"
+        and body[-1:] != b"&"
+    )
+
+
+def frame_values(raw: Union[bytes, str]) -> List[int]:
+    """Return every integer of a raw INFO frame (as stored in record["raw"])."""
+    return [int(token) for token in _as_bytes(raw)[1:-1].split(b"&")]
+
+
+@lru_cache(maxsize=None)
+def layout_decoder(layout: FrameLayout) -> InfoFrameDecoder:
+    """Return the decoder compiled for a frame layout (compiled once, shared by all heaters)."""
+    return InfoFrameDecoder(layout.idx_map)
+
+
+INFO_DECODER = layout_decoder(FRAME_LAYOUTS[0])
+
+
+def parse_info_message(payload: Payload) -> Optional[Dict[str, Any]]:
+    return INFO_DECODER.decode(payload)
+
+
+def parse_info_frame(frame: Union[bytes, str], *, idx_map: Mapping[str, int] = IDX) -> Dict[str, Any]:
+    decoder = INFO_DECODER if idx_map is IDX else InfoFrameDecoder(idx_map)
+    return decoder.decode_frame(_as_bytes(frame))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import heapq
+import time
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_MISSING = object()
+
+
+class PendingOverrides:
+    """Optimistic values that mask contradicting telemetry until confirmed or expired.
+
+    Deadlines live in a min-heap (stale heap items are skipped lazily) and a single
+    async_call_later handle is armed for the earliest one, so frames that arrive
+    while nothing is pending pay no cost. When entries expire or are released,
+    on_release receives the last telemetry value masked for each key.
+    """
+
+    def __init__(self, hass: HomeAssistant, on_release: Callable[[Dict[str, Any]], None]):
+        self.hass = hass
+        self._on_release = on_release
+        # key -> [pending value, deadline, last masked telemetry value]
+        self._entries: Dict[str, List[Any]] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._unsub_timer: Optional[Callable[[], None]] = None
+        self._timer_deadline: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @callback
+    def async_set(self, key: str, value: Any, ttl: float) -> None:
+        deadline = time.monotonic() + max(0.1, float(ttl))
+        entry = self._entries.get(key)
+        masked = entry[2] if entry is not None else _MISSING
+        self._entries[key] = [value, deadline, masked]
+        heapq.heappush(self._heap, (deadline, key))
+        self._async_arm()
+
+    @callback
+    def async_filter(self, reported: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Return the telemetry values that may be merged into state."""
+        if not self._entries:
+            return reported
+
+        accepted = {}
+        for key, value in reported.items():
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] != value:
+                    # Telemetry differs during the pending window: keep it for release, don't apply
+                    entry[2] = value
+                    continue
+                # Telemetry matches our pending value: accept and clear pending
+                del self._entries[key]
+            accepted[key] = value
+        return accepted
+
+    @callback
+    def async_discard(self, keys: Iterable[str]) -> None:
+        """Drop overrides without handing anything back."""
+        for key in keys:
+            self._entries.pop(key, None)
+
+    @callback
+    def async_release(self, keys: Iterable[str]) -> None:
+        """Drop overrides now (e.g. their command failed) and hand back masked telemetry."""
+        released = {}
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[2] is not _MISSING:
+                released[key] = entry[2]
+        self._on_release(released)
+
+    @callback
+    def _async_arm(self) -> None:
+        heap = self._heap
+        while heap:
+            deadline, key = heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == deadline:
+                break
+            heapq.heappop(heap)
+        if not heap:
+            self._async_disarm()
+            return
+
+        deadline = heap[0][0]
+        if self._timer_deadline is not None and self._timer_deadline <= deadline:
+            return
+        self._async_disarm()
+        self._timer_deadline = deadline
+        self._unsub_timer = async_call_later(
+            self.hass, max(0.0, deadline - time.monotonic()), self._async_expire
+        )
+
+    @callback
+    def _async_disarm(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._unsub_timer = None
+        self._timer_deadline = None
+
+    @callback
+    def _async_expire(self, _now=None) -> None:
+        self._unsub_timer = None
+        self._timer_deadline = None
+
+        now = time.monotonic()
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == deadline:
+                expired.append(key)
+        if expired:
+            self.async_release(expired)
+        self._async_arm()
+
+    @callback
+    def async_stop(self) -> None:
+        self._async_disarm()
+        self._entries.clear()
+        self._heap.clear()
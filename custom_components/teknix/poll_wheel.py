@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import time
+import zlib
+from collections import deque
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    DOMAIN,
+    DATA_POLL_WHEEL,
+    POLL_TICK_SECONDS,
+    POLL_WHEEL_TICK_SECONDS,
+    POLL_STARTUP_PER_TICK,
+    POLL_PHASE_JITTER,
+)
+
+# 1 / golden ratio: successive multiples modulo 1 stay evenly spread for any count
+_INV_GOLDEN = 0.6180339887498949
+
+
+@callback
+def async_get_poll_wheel(hass: HomeAssistant) -> PollWheel:
+    """Return the domain-wide poll wheel, creating it on first use."""
+    data = hass.data.setdefault(DOMAIN, {})
+    wheel = data.get(DATA_POLL_WHEEL)
+    if wheel is None:
+        wheel = data[DATA_POLL_WHEEL] = PollWheel(hass)
+    return wheel
+
+
+class _Member:
+    __slots__ = ("serial", "on_tick", "on_start", "phase", "slot", "started")
+
+    def __init__(self, serial: str, on_tick: Callable[[], None], on_start: Callable[[float], None], phase: float):
+        self.serial = serial
+        self.on_tick = on_tick
+        self.on_start = on_start
+        self.phase = phase
+        self.slot = 0
+        self.started = False
+
+
+class PollWheel:
+    """One timer that drives the poll schedulers of all hubs.
+
+    The timer fires every POLL_WHEEL_TICK_SECONDS and advances a wheel of
+    POLL_TICK_SECONDS / POLL_WHEEL_TICK_SECONDS slots; each hub sits in the
+    least used slot and is ticked once per turn, so schedulers are evaluated
+    as often as before but never all at once.
+
+    New hubs wait in a start-up queue that releases POLL_STARTUP_PER_TICK of
+    them per tick, so the first INFO polls after a restart are paced. Each hub
+    also gets a phase in [0, 1): the golden-ratio sequence over registration
+    order plus a small jitter derived from the serial, which the hub uses to
+    place its periodic polls, counted from epoch, evenly over the poll interval.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        # monotonic reference the hubs' poll phases are counted from
+        self.epoch = time.monotonic()
+        self._slots: List[List[_Member]] = [
+            [] for _ in range(max(1, round(POLL_TICK_SECONDS / POLL_WHEEL_TICK_SECONDS)))
+        ]
+        self._members: Dict[str, _Member] = {}
+        self._startup: deque[_Member] = deque()
+        self._position = 0
+        self._registered = 0
+        # start-ups released since the last timer tick
+        self._started_this_tick = 0
+        self._unsub_timer: Optional[Callable[[], None]] = None
+
+    @callback
+    def async_add(
+        self, serial: str, on_tick: Callable[[], None], on_start: Callable[[float], None]
+    ) -> Callable[[], None]:
+        """Register a hub; on_start(phase) is called once at its start-up turn, then on_tick() every turn."""
+        jitter = zlib.crc32(serial.encode()) / 0xFFFFFFFF * POLL_PHASE_JITTER
+        phase = (self._registered * _INV_GOLDEN + jitter) % 1.0
+        self._registered += 1
+
+        member = _Member(serial, on_tick, on_start, phase)
+        member.slot = min(range(len(self._slots)), key=lambda i: len(self._slots[i]))
+        self._slots[member.slot].append(member)
+        self._members[serial] = member
+        self._startup.append(member)
+
+        if self._unsub_timer is None:
+            self._unsub_timer = async_track_time_interval(
+                self.hass, self._async_tick, timedelta(seconds=POLL_WHEEL_TICK_SECONDS)
+            )
+        # the first hubs do not have to wait for the timer
+        self._async_release_startup()
+        return lambda: self._async_remove(member)
+
+    @callback
+    def _async_remove(self, member: _Member) -> None:
+        if self._members.get(member.serial) is not member:
+            return
+        del self._members[member.serial]
+        self._slots[member.slot].remove(member)
+        if member in self._startup:
+            self._startup.remove(member)
+        if not self._members and self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+            self._registered = 0
+
+    @callback
+    def _async_release_startup(self) -> None:
+        budget = POLL_STARTUP_PER_TICK - self._started_this_tick
+        while budget > 0 and self._startup:
+            member = self._startup.popleft()
+            member.started = True
+            member.on_start(member.phase)
+            budget -= 1
+            self._started_this_tick += 1
+
+    @callback
+    def _async_tick(self, _now=None) -> None:
+        self._started_this_tick = 0
+        self._async_release_startup()
+
+        self._position = (self._position + 1) % len(self._slots)
+        for member in list(self._slots[self._position]):
+            if member.started:
+                member.on_tick()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "slots": [len(slot) for slot in self._slots],
+            "waiting_for_startup": [m.serial for m in self._startup],
+            "phases": {m.serial: round(m.phase, 3) for m in self._members.values()},
+        }
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+
+class PollScheduler:
+    """Decide when a periodic poll command (INFO, PO1800NG) is due.
+
+    Driven by a coarse tick with monotonic timestamps:
+    - a frame that is not the answer to the outstanding poll defers the next
+      poll by a full interval (skipped_fresh), unless skip_fresh is False
+      because frames do not replace the command;
+    - every poll left unanswered doubles the interval up to max_interval;
+    - after a user command, polls run every boost_interval for boost_duration;
+    - stagger() moves the next poll to a given phase of the interval.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        max_interval: float,
+        boost_interval: Optional[float] = None,
+        boost_duration: float = 0.0,
+        skip_fresh: bool = True,
+    ):
+        self.interval = float(interval)
+        self.max_interval = max(float(max_interval), self.interval)
+        self.boost_interval = boost_interval
+        self.boost_duration = float(boost_duration)
+        self.skip_fresh = skip_fresh
+
+        self.misses = 0
+        self.sent = 0
+        self.skipped_fresh = 0
+        self.last_decision: Optional[str] = None
+
+        self._last_poll: Optional[float] = None
+        self._last_frame: Optional[float] = None
+        # last frame that was not the answer to one of these polls
+        self._last_fresh: Optional[float] = None
+        self._awaiting = False
+        self._boost_until = 0.0
+        # the next poll is sent even if a fresh frame arrived (see stagger)
+        self._staggered = False
+
+    def current_interval(self, now: float) -> float:
+        if self.boost_interval and now < self._boost_until:
+            return self.boost_interval
+        return min(self.interval * (2 ** self.misses), self.max_interval)
+
+    def due(self, now: float) -> bool:
+        """Return True if the poll should be sent now (and record it as sent)."""
+        interval = self.current_interval(now)
+        if self._last_poll is not None and now - self._last_poll < interval:
+            return False
+
+        boosting = now < self._boost_until
+        if (
+            self.skip_fresh
+            and not boosting
+            and not self._staggered
+            and self._last_fresh is not None
+            and now - self._last_fresh < interval
+        ):
+            # Fresh telemetry already arrived; count from that frame instead
+            self._last_poll = self._last_fresh
+            self.skipped_fresh += 1
+            self.last_decision = "skipped_fresh"
+            return False
+
+        if self._awaiting and not boosting:
+            self.misses += 1
+        self._awaiting = True
+        self._staggered = False
+        self._last_poll = now
+        self.sent += 1
+        self.last_decision = "backoff" if self.misses else ("boost" if boosting else "sent")
+        return True
+
+    def frame_received(self, now: float) -> None:
+        self._last_frame = now
+        if self._awaiting:
+            # the answer to the last poll; the schedule already counts from that poll
+            self._awaiting = False
+        else:
+            self._last_fresh = now
+        self.misses = 0
+
+    def stagger(self, now: float, phase: float, epoch: float = 0.0) -> None:
+        """Move the schedule so polls fall phase (0..1) of an interval after epoch.
+
+        The next poll is the first such point at least half an interval after
+        now. The fresh-frame skip is suspended for that one poll, otherwise the
+        answer to the previous poll would pull the schedule back to where it was.
+        """
+        offset = epoch + phase * self.interval
+        periods = math.ceil((now + self.interval / 2 - offset) / self.interval)
+        self._last_poll = offset + periods * self.interval - self.interval
+        self._staggered = True
+
+    def command_sent(self, now: float) -> None:
+        if self.boost_interval:
+            self._boost_until = now + self.boost_duration
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "interval_s": self.current_interval(now),
+            "misses": self.misses,
+            "sent": self.sent,
+            "skipped_fresh": self.skipped_fresh,
+            "last_decision": self.last_decision,
+            "boost_remaining_s": round(max(0.0, self._boost_until - now), 1),
+            "last_frame_age_s": None if self._last_frame is None else round(now - self._last_frame, 1),
+        }
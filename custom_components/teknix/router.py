@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+from homeassistant import config_entries
+from homeassistant.components import mqtt
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import discovery_flow
+
+from .const import DOMAIN, DATA_ROUTER, CONF_SERIAL, TELE_RESULT, TELE_LWT, device_serial, device_topic, tele_topic
+from .parser import INFO_DECODER, FrameError, extract_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+# tele leaves consumed by hubs; each gets one wildcard subscription for all devices
+ROUTED_LEAVES = (TELE_RESULT, TELE_LWT)
+
+
+@callback
+def async_get_router(hass: HomeAssistant) -> TeknixRouter:
+    """Return the domain-wide router, creating it on first use."""
+    data = hass.data.setdefault(DOMAIN, {})
+    router = data.get(DATA_ROUTER)
+    if router is None:
+        router = data[DATA_ROUTER] = TeknixRouter(hass)
+    return router
+
+
+class TeknixRouter:
+    """Share one tele subscription per leaf between all Teknix hubs.
+
+    Messages are routed to hubs by the device part of the topic
+    (tele/tasmota_<serial>/<leaf>), so cost grows with message volume
+    rather than with the number of config entries.
+
+    A valid INFO frame from a device without a hub starts a discovery flow,
+    once per device: manifest discovery stops with the first configured heater.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        # device topic -> {leaf: handler}
+        self._routes: dict[str, dict[str, Callable]] = {}
+        self._unsub: list[Callable[[], None]] = []
+        self._subscribed = False
+        # serials a discovery flow was started for
+        self._discovered: set[str] = set()
+
+    async def async_register(self, serial: str, handlers: dict[str, Callable]) -> None:
+        self._routes[device_topic(serial)] = handlers
+        if self._subscribed:
+            return
+
+        self._subscribed = True
+        for leaf in ROUTED_LEAVES:
+            topic = tele_topic(leaf)
+            _LOGGER.debug("Teknix router subscribing to %s", topic)
+            self._unsub.append(
+                await mqtt.async_subscribe(
+                    self.hass, topic, self._message_received, encoding=None
+                )
+            )
+
+    @callback
+    def async_unregister(self, serial: str) -> None:
+        self._routes.pop(device_topic(serial), None)
+        # a removed heater can be discovered again
+        self._discovered.discard(serial)
+        if self._routes:
+            return
+
+        while self._unsub:
+            self._unsub.pop()()
+        self._subscribed = False
+
+    @callback
+    def _message_received(self, msg) -> None:
+        _, _, rest = msg.topic.partition("/")
+        device, _, leaf = rest.partition("/")
+        handlers = self._routes.get(device)
+        if handlers is None:
+            if leaf == TELE_RESULT:
+                self._async_discover(device, msg.payload)
+            return
+        handler = handlers.get(leaf)
+        if handler is not None:
+            handler(msg)
+
+    @callback
+    def _async_discover(self, device: str, payload) -> None:
+        serial = device_serial(device)
+        if serial is None or serial in self._discovered:
+            return
+        frame = extract_frame(payload)
+        if not frame:
+            return
+        try:
+            info = INFO_DECODER.decode_frame(frame)
+        except FrameError:
+            return
+        self._discovered.add(serial)
+        _LOGGER.debug("Teknix router discovered heater %s", serial)
+        discovery_flow.async_create_flow(
+            self.hass,
+            DOMAIN,
+            context={"source": config_entries.SOURCE_INTEGRATION_DISCOVERY},
+            data={
+                CONF_SERIAL: serial,
+                "house_heating_step": info["house_heating_step"],
+                "tank_heating_step": info["tank_heating_step"],
+            },
+        )
@@ -1,19 +1,36 @@
 from __future__ import annotations
+import time
 from dataclasses import dataclass
+from datetime import timedelta
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorEntityDescription,
     SensorDeviceClass,
+    SensorStateClass,
 )
-from homeassistant.const import UnitOfTemperature, UnitOfPower
+from homeassistant.const import UnitOfEnergy, UnitOfTemperature, UnitOfPower, UnitOfTime
 from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
-from .const import DOMAIN, DISPATCH_SIGNAL
+from homeassistant.helpers.event import async_call_later
+from .const import (
+    DOMAIN, AVAILABLE_KEY,
+    CONF_TEMP_DEADBAND, CONF_TEMP_MIN_INTERVAL, CONF_TEMP_MAX_INTERVAL,
+    DEFAULT_TEMP_DEADBAND, DEFAULT_TEMP_MIN_INTERVAL_SECONDS, DEFAULT_TEMP_MAX_INTERVAL_SECONDS,
+)
+from .energy import compute_power_kw
+from .fields import OPTIONAL_FIELDS
+from .metrics import TIMINGS
+
+# Only the (disabled by default) metric sensors poll; everything else is pushed
+SCAN_INTERVAL = timedelta(seconds=30)
 
 @dataclass
 class TeknixSensorDescription(SensorEntityDescription):
     entity_category: EntityCategory | None = None
+    # write state only on significant changes (options: temp_deadband / temp_*_interval)
+    significant_change: bool = False
+    # frame position named by the shared info_position translation
+    info_index: int | None = None
 
 SENSOR_DESCS: list[TeknixSensorDescription] = [
     TeknixSensorDescription(
@@ -23,6 +40,7 @@ SENSOR_DESCS: list[TeknixSensorDescription] = [
         device_class=SensorDeviceClass.TEMPERATURE,
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        significant_change=True,
     ),
     TeknixSensorDescription(
         key="tank_water_temp",
@@ -31,6 +49,7 @@ SENSOR_DESCS: list[TeknixSensorDescription] = [
         device_class=SensorDeviceClass.TEMPERATURE,
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        significant_change=True,
     ),
     TeknixSensorDescription(
         key="house_target_temp",
@@ -48,23 +67,141 @@ SENSOR_DESCS: list[TeknixSensorDescription] = [
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
     ),
+    TeknixSensorDescription(
+        key="energy_kwh",
+        translation_key="energy",
+        icon="mdi:lightning-bolt",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+    ),
+]
+
+# INFO fields without an entity of their own, as disabled-by-default sensors;
+# the hub only decodes the ones that are enabled
+FIELD_DESCS: list[TeknixSensorDescription] = [
+    TeknixSensorDescription(
+        key=f.key,
+        translation_key=f.translation_key or "info_position",
+        info_index=None if f.translation_key else f.index,
+        icon="mdi:numeric",
+        device_class=f.device_class,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_unit_of_measurement=f.unit,
+        entity_registry_enabled_default=False,
+    )
+    for f in OPTIONAL_FIELDS
+]
+
+@dataclass
+class TeknixMetricDescription(SensorEntityDescription):
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+    # name of a HubMetrics timing; the sensor reports its mean in ms
+    timing: str | None = None
+
+METRIC_DESCS: list[TeknixMetricDescription] = [
+    *(
+        TeknixMetricDescription(
+            key=key,
+            translation_key=key,
+            icon="mdi:counter",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+        )
+        for key in (
+            "frames_received",
+            "frames_parsed",
+            "frames_rejected",
+            "frames_suppressed",
+            "frames_duplicate",
+            "commands_sent",
+            "store_saves",
+        )
+    ),
+    *(
+        TeknixMetricDescription(
+            key=f"{name}_time",
+            translation_key=f"{name}_time",
+            icon="mdi:timer-outline",
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            suggested_display_precision=3,
+            timing=name,
+        )
+        for name in TIMINGS
+    ),
 ]
 
 async def async_setup_entry(hass, entry, async_add_entities):
     hub = hass.data[DOMAIN][entry.entry_id]
-    entities = [TeknixSensor(hub, entry.entry_id, d) for d in SENSOR_DESCS]
+    options = entry.options
+    rule = (
+        float(options.get(CONF_TEMP_DEADBAND, DEFAULT_TEMP_DEADBAND)),
+        float(options.get(CONF_TEMP_MIN_INTERVAL, DEFAULT_TEMP_MIN_INTERVAL_SECONDS)),
+        float(options.get(CONF_TEMP_MAX_INTERVAL, DEFAULT_TEMP_MAX_INTERVAL_SECONDS)),
+    )
+    entities = [
+        TeknixSensor(hub, entry.entry_id, d, SignificantChange(*rule) if d.significant_change else None)
+        for d in SENSOR_DESCS
+    ]
+    entities.extend(TeknixSensor(hub, entry.entry_id, d) for d in FIELD_DESCS)
     entities.append(TeknixCurrentConsumptionSensor(hub, entry.entry_id))
+    entities.extend(TeknixMetricSensor(hub, entry.entry_id, d) for d in METRIC_DESCS)
     async_add_entities(entities)
 
+class SignificantChange:
+    """Decide which value changes of a noisy sensor are worth a state write.
+
+    A write happens when the value moved by at least deadband since the last
+    written value, but no sooner than min_interval after the previous write
+    (the write is deferred instead), and always once max_interval has passed.
+    The sensor also rewrites its state max_interval after each write, so a
+    value that does not change still gets a heartbeat.
+    """
+
+    def __init__(self, deadband: float, min_interval: float, max_interval: float):
+        self.deadband = deadband
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._value = None
+        self._written_at = 0.0
+
+    def delay(self, value, now: float) -> float | None:
+        """Seconds until value should be written (0: now), or None to skip it."""
+        if self._value is None or value is None:
+            return 0.0
+        elapsed = now - self._written_at
+        if self.max_interval and elapsed >= self.max_interval:
+            return 0.0
+        if round(abs(value - self._value), 6) < self.deadband:
+            return None
+        return max(0.0, self.min_interval - elapsed)
+
+    def written(self, value, now: float) -> None:
+        self._value = value
+        self._written_at = now
+
+
 class TeknixSensor(SensorEntity):
     _attr_has_entity_name = True
+    _attr_should_poll = False
 
-    def __init__(self, hub, entry_id: str, desc: TeknixSensorDescription):
+    def __init__(self, hub, entry_id: str, desc: TeknixSensorDescription, rule: SignificantChange | None = None):
         self._hub = hub
         self._entry_id = entry_id
         self.entity_description = desc
         self._attr_unique_id = f"{DOMAIN}_{entry_id}_{desc.key}"
         self._unsub = None
+        self._unsub_available = None
+        self._rule = rule
+        self._unsub_deferred = None
+        self._unsub_heartbeat = None
+        if rule is not None:
+            # the rule already limits writes; an unchanged heartbeat must still be recorded
+            self._attr_force_update = True
+        if desc.info_index is not None:
+            self._attr_translation_placeholders = {"index": str(desc.info_index)}
 
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, self._hub.serial)},
@@ -76,25 +213,79 @@ class TeknixSensor(SensorEntity):
 
     @property
     def available(self) -> bool:
-        return bool(getattr(self._hub, "state", None))
+        return self._hub.available and bool(self._hub.state)
 
     @property
     def native_value(self):
-        return (self._hub.state or {}).get(self.entity_description.key)
+        return getattr(self._hub.state, self.entity_description.key)
 
     async def async_added_to_hass(self):
-        self._unsub = async_dispatcher_connect(
-            self.hass, f"{DISPATCH_SIGNAL}_{self._entry_id}", self._handle_state
-        )
+        self._unsub = self._hub.async_subscribe(self.entity_description.key, self._handle_state)
+        # written at once, not held back by the write rule
+        self._unsub_available = self._hub.async_subscribe(AVAILABLE_KEY, self.async_write_ha_state)
+        # HA writes the initial state
+        self._arm_heartbeat()
 
     async def async_will_remove_from_hass(self):
         if self._unsub:
             self._unsub()
             self._unsub = None
+        if self._unsub_available:
+            self._unsub_available()
+            self._unsub_available = None
+        self._cancel_deferred()
+        self._cancel_heartbeat()
 
     @callback
     def _handle_state(self):
+        if self._rule is None:
+            self.async_write_ha_state()
+            return
+
+        delay = self._rule.delay(self.native_value, time.monotonic())
+        if delay is None:
+            # below the deadband: drop the write and any deferred one
+            self._cancel_deferred()
+            self._hub.suppressed_writes += 1
+        elif delay <= 0:
+            self._write_significant()
+        elif self._unsub_deferred is None:
+            self._unsub_deferred = async_call_later(self.hass, delay, self._write_significant)
+        else:
+            self._hub.suppressed_writes += 1
+
+    @callback
+    def _write_significant(self, _now=None):
+        self._cancel_deferred()
+        self._rule.written(self.native_value, time.monotonic())
         self.async_write_ha_state()
+        self._arm_heartbeat()
+
+    @callback
+    def _arm_heartbeat(self):
+        """(Re)start the max_interval countdown to the next forced write."""
+        self._cancel_heartbeat()
+        if self._rule is not None and self._rule.max_interval:
+            self._unsub_heartbeat = async_call_later(
+                self.hass, self._rule.max_interval, self._write_heartbeat
+            )
+
+    @callback
+    def _write_heartbeat(self, _now=None):
+        self._unsub_heartbeat = None
+        self._write_significant()
+
+    @callback
+    def _cancel_deferred(self):
+        if self._unsub_deferred:
+            self._unsub_deferred()
+            self._unsub_deferred = None
+
+    @callback
+    def _cancel_heartbeat(self):
+        if self._unsub_heartbeat:
+            self._unsub_heartbeat()
+            self._unsub_heartbeat = None
 
 class TeknixCurrentConsumptionSensor(SensorEntity):
     """Diagnostic sensor: instantaneous power (kW) computed from active mode and steps."""
@@ -104,6 +295,7 @@ class TeknixCurrentConsumptionSensor(SensorEntity):
     _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
     _attr_state_class = "measurement"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
 
     def __init__(self, hub, entry_id: str):
         self._hub = hub
@@ -118,61 +310,105 @@ class TeknixCurrentConsumptionSensor(SensorEntity):
             sw_version=getattr(self._hub, "firmware", None),
         )
         self._unsub = None
+        self._unsub_available = None
+        # (state version, kW, attributes) of the last computation
+        self._derived = (None, None, None)
+
+    def _derived_values(self):
+        state = self._hub.state
+        if self._derived[0] != state.version:
+            self._derived = (
+                state.version,
+                compute_power_kw(state, self._hub.step_max, self._hub.element_kw),
+                {
+                    "model": self._hub.model,
+                    "element_kw": self._hub.element_kw,
+                    "max_step": self._hub.step_max,
+                    "house_heating_active": state.house_heating_active,
+                    "tank_heating_active": state.tank_heating_active,
+                    "house_heating_step": state.house_heating_step,
+                    "tank_heating_step": state.tank_heating_step,
+                },
+            )
+        return self._derived
 
     @property
     def available(self) -> bool:
-        return bool(getattr(self._hub, "state", None))
+        return self._hub.available and bool(self._hub.state)
 
     @property
     def native_value(self):
         """Return instantaneous power in kW."""
-        s = self._hub.state or {}
-
-        house_active = bool(s.get("house_heating_active"))
-        tank_active = bool(s.get("tank_heating_active"))
-
-        step_max = int(getattr(self._hub, "step_max", 6) or 6)
-        house_step = max(0, min(int(s.get("house_heating_step", 0) or 0), step_max))
-        tank_step = max(0, min(int(s.get("tank_heating_step", 0) or 0), step_max))
-
-        element_kw = float(getattr(self._hub, "element_kw", 0.0) or 0.0)
-        if element_kw <= 0:
-            return 0.0
-
-        if tank_active and not house_active:
-            step = tank_step
-        elif house_active and not tank_active:
-            step = house_step
-        elif house_active and tank_active:
-            step = max(house_step, tank_step)
-        else:
-            step = 0
-
-        return round(step * element_kw, 2)
+        return self._derived_values()[1]
 
     @property
     def extra_state_attributes(self):
-        s = self._hub.state or {}
-        return {
-            "model": self._hub.model,
-            "element_kw": getattr(self._hub, "element_kw", None),
-            "max_step": getattr(self._hub, "step_max", None),
-            "house_heating_active": s.get("house_heating_active"),
-            "tank_heating_active": s.get("tank_heating_active"),
-            "house_heating_step": s.get("house_heating_step"),
-            "tank_heating_step": s.get("tank_heating_step"),
-        }
+        return self._derived_values()[2]
 
     async def async_added_to_hass(self):
-        self._unsub = async_dispatcher_connect(
-            self.hass, f"{DISPATCH_SIGNAL}_{self._entry_id}", self._handle_state
-        )
+        self._unsub = self._hub.async_subscribe("current_consumption", self._handle_state)
+        self._unsub_available = self._hub.async_subscribe(AVAILABLE_KEY, self._handle_state)
 
     async def async_will_remove_from_hass(self):
         if self._unsub:
             self._unsub()
             self._unsub = None
+        if self._unsub_available:
+            self._unsub_available()
+            self._unsub_available = None
 
     @callback
     def _handle_state(self):
-        self.async_write_ha_state()
\ No newline at end of file
+        self.async_write_ha_state()
+
+class TeknixMetricSensor(SensorEntity):
+    """Diagnostic sensor for a hub counter or timing, polled every SCAN_INTERVAL.
+
+    Timings are only measured while at least one timing sensor is enabled.
+    """
+    _attr_has_entity_name = True
+    _attr_should_poll = True
+
+    def __init__(self, hub, entry_id: str, desc: TeknixMetricDescription):
+        self._hub = hub
+        self._entry_id = entry_id
+        self.entity_description = desc
+        self._attr_unique_id = f"{DOMAIN}_{entry_id}_metric_{desc.key}"
+        self._metrics: dict = {}
+
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._hub.serial)},
+            manufacturer="Teknix",
+            model=self._hub.model,
+            name=f"Teknix {self._hub.model}",
+            sw_version=getattr(self._hub, "firmware", None),
+        )
+
+    @property
+    def native_value(self):
+        timing = self.entity_description.timing
+        if timing is not None:
+            return self._metrics.get("timings", {}).get(timing, {}).get("mean_ms")
+        return self._metrics.get(self.entity_description.key)
+
+    @property
+    def extra_state_attributes(self):
+        timing = self.entity_description.timing
+        if timing is not None:
+            data = self._metrics.get("timings", {}).get(timing, {})
+            return {k: v for k, v in data.items() if k != "mean_ms"}
+        if self.entity_description.key == "frames_rejected":
+            return self._metrics.get("frames_rejected_by_reason")
+        return None
+
+    async def async_added_to_hass(self):
+        if self.entity_description.timing is not None:
+            self._hub.metrics.async_enable_timing()
+        self._metrics = self._hub.metrics_diagnostics()
+
+    async def async_will_remove_from_hass(self):
+        if self.entity_description.timing is not None:
+            self._hub.metrics.async_disable_timing()
+
+    async def async_update(self):
+        self._metrics = self._hub.metrics_diagnostics()
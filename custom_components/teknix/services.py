@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .allocator import async_get_allocator
+from .const import DOMAIN, SERVICE_APPLY_PROFILE, SERVICE_DUMP_FRAME_HISTORY, SERVICE_SET_POWER_BUDGET
+
+ATTR_DEVICE_ID = "device_id"
+
+DUMP_FRAME_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_DEVICE_ID): cv.string,
+})
+
+# apply_profile field -> hub state key
+PROFILE_FIELDS = {
+    "boiler_power": "boiler_power_state",
+    "house_heating": "house_heating_active",
+    "tank_heating": "tank_heating_active",
+    "house_target_temp": "house_target_temp",
+    "tank_target_temp": "tank_target_temp",
+    "house_heating_step": "house_heating_step",
+    "tank_heating_step": "tank_heating_step",
+}
+
+_TEMP = vol.All(vol.Coerce(int), vol.Range(min=30, max=80))
+_STEP = vol.All(vol.Coerce(int), vol.Range(min=1, max=6))
+
+APPLY_PROFILE_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+        vol.Optional("boiler_power"): cv.boolean,
+        vol.Optional("house_heating"): cv.boolean,
+        vol.Optional("tank_heating"): cv.boolean,
+        vol.Optional("house_target_temp"): _TEMP,
+        vol.Optional("tank_target_temp"): _TEMP,
+        vol.Optional("house_heating_step"): _STEP,
+        vol.Optional("tank_heating_step"): _STEP,
+    }),
+    cv.has_at_least_one_key(*PROFILE_FIELDS),
+)
+
+ATTR_POWER = "power"
+
+SET_POWER_BUDGET_SCHEMA = vol.Schema({
+    # kW shared by all heaters; 0 removes the budget
+    vol.Required(ATTR_POWER): vol.All(vol.Coerce(float), vol.Range(min=0)),
+})
+
+
+@callback
+def _async_get_hubs(hass: HomeAssistant, device_id: str | None) -> list:
+    data = hass.data.get(DOMAIN, {})
+    hubs = [
+        hub
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if (hub := data.get(entry.entry_id)) is not None
+    ]
+    if device_id is not None:
+        hubs = [hub for hub in hubs if hub.device_id == device_id]
+        if not hubs:
+            raise HomeAssistantError(f"No Teknix heater with device id {device_id}")
+    return hubs
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def _async_dump_frame_history(call: ServiceCall) -> ServiceResponse:
+        hubs = _async_get_hubs(hass, call.data.get(ATTR_DEVICE_ID))
+        return {hub.serial: hub.history_diagnostics() for hub in hubs}
+
+    async def _async_apply_profile(call: ServiceCall) -> None:
+        hubs = _async_get_hubs(hass, call.data.get(ATTR_DEVICE_ID))
+        profile = {key: call.data[field] for field, key in PROFILE_FIELDS.items() if field in call.data}
+        # every heater gets its batch right away; wait for all confirmations together
+        await asyncio.gather(*(hub.async_apply_profile(profile) for hub in hubs))
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_PROFILE,
+        _async_apply_profile,
+        schema=APPLY_PROFILE_SCHEMA,
+    )
+    async def _async_set_power_budget(call: ServiceCall) -> None:
+        await async_get_allocator(hass).async_set_budget(call.data[ATTR_POWER])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_POWER_BUDGET,
+        _async_set_power_budget,
+        schema=SET_POWER_BUDGET_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_FRAME_HISTORY,
+        _async_dump_frame_history,
+        schema=DUMP_FRAME_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Set, Tuple
+
+from .fields import CORE_FIELDS, OPTIONAL_FIELDS, OPTIONAL_FIELD_KEYS
+
+# State key -> type its values are coerced to on write, so readers get typed values
+FIELD_TYPES: Mapping[str, Callable[[Any], Any]] = MappingProxyType({
+    **{f.key: f.kind for f in CORE_FIELDS},
+    "energy_kwh": float,
+    "raw": bytes,
+    **{f.key: f.kind for f in OPTIONAL_FIELDS},
+})
+
+# Keys with a slot of their own. Optional INFO fields share one mapping, so
+# copying a snapshot does not grow with the field table.
+_SLOT_KEYS = tuple(key for key in FIELD_TYPES if key not in OPTIONAL_FIELD_KEYS)
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+class TeknixState:
+    """Immutable, typed snapshot of a heater's state.
+
+    Fields are None until first reported. A change never mutates a snapshot:
+    evolve() returns a copy with the next version, so readers may keep a
+    reference and cache values derived from it per version. get() reads a
+    snapshot like a mapping, for code shared with decoded frames
+    (compute_power_kw, build_profile_commands).
+    """
+
+    __slots__ = ("version", "_optional", *_SLOT_KEYS)
+
+    version: int
+    boiler_power_state: Optional[bool]
+    house_heating_active: Optional[bool]
+    tank_heating_active: Optional[bool]
+    house_target_temp: Optional[int]
+    tank_target_temp: Optional[int]
+    house_heating_step: Optional[int]
+    tank_heating_step: Optional[int]
+    house_loop_temp: Optional[float]
+    tank_water_temp: Optional[float]
+    energy_kwh: Optional[float]
+    raw: Optional[bytes]
+    # plus one Optional value per optional INFO field (fields.OPTIONAL_FIELDS),
+    # read through __getattr__
+
+    def __init__(self, values: Mapping[str, Any] = _EMPTY, version: int = 0):
+        """Build a snapshot from stored values; unknown keys and bad values are dropped."""
+        typed: Dict[str, Any] = {}
+        for key, kind in FIELD_TYPES.items():
+            value = values.get(key)
+            if value is not None:
+                try:
+                    typed[key] = kind(value)
+                except (TypeError, ValueError):
+                    pass
+        init = object.__setattr__
+        for key in _SLOT_KEYS:
+            init(self, key, typed.pop(key, None))
+        init(self, "_optional", MappingProxyType(typed))
+        init(self, "version", version)
+
+    def __getattr__(self, key: str) -> Any:
+        # only reached for names that are not slots
+        if key in FIELD_TYPES:
+            return self._optional.get(key)
+        raise AttributeError(key)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("TeknixState is immutable; use evolve()")
+
+    def __bool__(self) -> bool:
+        """True once any value is known."""
+        return any(getattr(self, key) is not None for key in _SLOT_KEYS) or bool(self._optional)
+
+    def __repr__(self) -> str:
+        return f"TeknixState(v{self.version}, {self.as_dict()})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key) if key in FIELD_TYPES else None
+        return default if value is None else value
+
+    def evolve(self, values: Mapping[str, Any]) -> Tuple[TeknixState, Set[str]]:
+        """Return (snapshot with values applied, changed keys); self if nothing changed.
+
+        Raises KeyError for a key that is not a state field.
+        """
+        changed: Dict[str, Any] = {}
+        for key, value in values.items():
+            if value is not None:
+                value = FIELD_TYPES[key](value)
+            elif key not in FIELD_TYPES:
+                raise KeyError(key)
+            if getattr(self, key) != value:
+                changed[key] = value
+        if not changed:
+            return self, set()
+
+        keys = set(changed)
+        state = object.__new__(TeknixState)
+        init = object.__setattr__
+        for key in _SLOT_KEYS:
+            init(state, key, changed.pop(key) if key in changed else getattr(self, key))
+        optional = self._optional
+        if changed:
+            # what is left are optional fields
+            merged = {**optional, **changed}
+            optional = MappingProxyType({k: v for k, v in merged.items() if v is not None})
+        init(state, "_optional", optional)
+        init(state, "version", self.version + 1)
+        return state, keys
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Known values as a plain dict."""
+        data = {key: value for key in _SLOT_KEYS if (value := getattr(self, key)) is not None}
+        data.update(self._optional)
+        return data
@@ -7,12 +7,8 @@ from homeassistant.components.switch import (
 )
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import (
-    async_dispatcher_connect,
-    async_dispatcher_send,
-)
 
-from .const import DOMAIN, DISPATCH_SIGNAL
+from .const import DOMAIN, AVAILABLE_KEY
 from .commands import (
     build_boiler_power_command,
     build_house_heating_active_command,
@@ -35,6 +31,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
 class TeknixSwitch(SwitchEntity):
     _attr_has_entity_name = True
+    _attr_should_poll = False
 
     def __init__(self, hub, entry_id: str, desc: SwitchEntityDescription):
         self._hub = hub
@@ -42,6 +39,7 @@ class TeknixSwitch(SwitchEntity):
         self.entity_description = desc
         self._attr_unique_id = f"{DOMAIN}:{entry_id}:sw:{desc.key}"
         self._unsub = None
+        self._unsub_available = None
 
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, getattr(self._hub, "serial", self._entry_id))},
@@ -52,12 +50,13 @@ class TeknixSwitch(SwitchEntity):
         )
         _LOGGER.debug("Teknix.switch entity init: %s", self._attr_unique_id)
 
+    @property
+    def available(self) -> bool:
+        return self._hub.available and bool(self._hub.state)
+
     @property
     def is_on(self) -> bool:
-        state = (getattr(self._hub, "state", {}) or {}).get(self.entity_description.key)
-        if isinstance(state, bool):
-            return state
-        return str(state).lower() in ("1", "true", "on")
+        return bool(getattr(self._hub.state, self.entity_description.key))
 
     async def async_turn_on(self, **kwargs):
         await self._apply_state(True)
@@ -78,26 +77,22 @@ class TeknixSwitch(SwitchEntity):
             _LOGGER.warning("Unknown switch key %s, not sending command", key)
             return
 
-        await self._hub.publish(cmd)
-        _LOGGER.debug("Sent switch cmd for %s = %s: %s", key, turn_on, cmd)
-
-        # mark this key as pending to suppress racing telemetry for a short time
-        if hasattr(self._hub, "set_pending"):
-            self._hub.set_pending(key, 1 if turn_on else 0)
-
-        (self._hub.state or {}).update({key: 1 if turn_on else 0})
-        async_dispatcher_send(self.hass, f"{DISPATCH_SIGNAL}_{self._entry_id}")
-        self.async_write_ha_state()
+        # queued per switch; the hub updates state optimistically and notifies us
+        confirmed = self._hub.async_request(key, cmd, {key: turn_on})
+        _LOGGER.debug("Queued switch cmd for %s = %s: %s", key, turn_on, cmd)
+        await confirmed
 
     async def async_added_to_hass(self):
-        self._unsub = async_dispatcher_connect(
-            self.hass, f"{DISPATCH_SIGNAL}_{self._entry_id}", self._handle_state
-        )
+        self._unsub = self._hub.async_subscribe(self.entity_description.key, self._handle_state)
+        self._unsub_available = self._hub.async_subscribe(AVAILABLE_KEY, self._handle_state)
 
     async def async_will_remove_from_hass(self):
         if self._unsub:
             self._unsub()
             self._unsub = None
+        if self._unsub_available:
+            self._unsub_available()
+            self._unsub_available = None
 
     @callback
     def _handle_state(self):
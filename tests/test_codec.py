@@ -0,0 +1,133 @@
+"""Encode/decode properties of the protocol codec, checked over the full command tables."""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from custom_components.teknix.codec import (
+    COMMAND_VALUES,
+    HOUSE_TEMP_COMMANDS,
+    POWER_COMMANDS,
+    STEP_RANGE,
+    SWITCH_COMMANDS,
+    TANK_TEMP_COMMANDS,
+    TEMP_RANGE,
+    _house_temp_command,
+    _power_command,
+    _tank_temp_command,
+    decode_command,
+)
+from custom_components.teknix.fields import INFO_FIELDS, INFO_FRAME_LENGTH
+from custom_components.teknix.parser import (
+    INFO_DECODER,
+    REJECT_OUT_OF_RANGE,
+    FrameError,
+)
+
+_TABLES = [
+    *((cmd, {"house_heating_step": h, "tank_heating_step": t}) for (h, t), cmd in POWER_COMMANDS.items()),
+    *((cmd, {"house_target_temp": t}) for t, cmd in HOUSE_TEMP_COMMANDS.items()),
+    *((cmd, {"tank_target_temp": t}) for t, cmd in TANK_TEMP_COMMANDS.items()),
+    *((cmd, {key: on}) for key, cmds in SWITCH_COMMANDS.items() for on, cmd in cmds.items()),
+]
+
+
+def _checksum_variants(command: str):
+    """Every command that differs from command only in its two checksum digits."""
+    head, checksum = command[:-3], command[-3:-1]
+    for value in range(100):
+        variant = f"{value:02d}"
+        if variant != checksum:
+            yield f"{head}{variant}Z"
+
+
+def _frame(**overrides) -> bytes:
+    values = [0] * INFO_FRAME_LENGTH
+    for field in INFO_FIELDS:
+        if field.lo is not None:
+            values[field.index] = max(field.lo, 0)
+    for key, value in overrides.items():
+        values[next(f.index for f in INFO_FIELDS if f.key == key)] = value
+    return ("I" + "&".join(map(str, values)) + "Z").encode()
+
+
+@pytest.mark.parametrize(("command", "values"), _TABLES)
+def test_decode_inverts_encode(command, values):
+    assert decode_command(command) == values
+
+
+def test_encode_inverts_decode():
+    # every decodable command is the one its values encode to
+    for command, values in COMMAND_VALUES.items():
+        if "house_heating_step" in values:
+            assert POWER_COMMANDS[values["house_heating_step"], values["tank_heating_step"]] == command
+        elif "house_target_temp" in values:
+            assert HOUSE_TEMP_COMMANDS[values["house_target_temp"]] == command
+        elif "tank_target_temp" in values:
+            assert TANK_TEMP_COMMANDS[values["tank_target_temp"]] == command
+        else:
+            ((key, on),) = values.items()
+            assert SWITCH_COMMANDS[key][on] == command
+    assert len(COMMAND_VALUES) == len(_TABLES)
+
+
+@pytest.mark.parametrize("command", [cmd for cmd, _ in _TABLES])
+def test_corrupted_checksum_is_rejected(command):
+    for variant in _checksum_variants(command):
+        assert decode_command(variant) is None, variant
+
+
+def test_corrupted_command_is_rejected():
+    rng = random.Random(15)
+    for command, _ in _TABLES:
+        for _ in range(20):
+            pos = rng.randrange(1, len(command) - 1)
+            digit = rng.choice([d for d in "0123456789ABCDEF" if d != command[pos]])
+            corrupted = command[:pos] + digit + command[pos + 1:]
+            if corrupted not in COMMAND_VALUES:
+                assert decode_command(corrupted) is None
+            else:
+                # a flipped value digit may hit another valid command, never a wrong value for it
+                assert decode_command(corrupted) == COMMAND_VALUES[corrupted] != COMMAND_VALUES[command]
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        _power_command(0, 1),
+        _power_command(1, 0),
+        _power_command(max(STEP_RANGE) + 1, 1),
+        _house_temp_command(min(TEMP_RANGE) - 1),
+        _house_temp_command(max(TEMP_RANGE) + 1),
+        _tank_temp_command(min(TEMP_RANGE) - 1),
+        _tank_temp_command(max(TEMP_RANGE) + 1),
+    ],
+)
+def test_out_of_range_command_is_rejected(command):
+    # well-formed checksum, value outside what the heater accepts
+    assert decode_command(command) is None
+
+
+_RANGED_FIELDS = [f for f in INFO_FIELDS if f.core and f.lo is not None]
+
+
+@pytest.mark.parametrize(
+    ("field", "value"),
+    [(f, v) for f in _RANGED_FIELDS for v in sorted({f.lo, (f.lo + f.hi) // 2, f.hi})],
+    ids=lambda p: p.key if hasattr(p, "key") else str(p),
+)
+def test_frame_round_trip(field, value):
+    record = INFO_DECODER.decode_frame(_frame(**{field.key: value}))
+    assert record[field.key] == field.decode(value)
+    assert type(record[field.key]) is field.kind
+    assert record["raw"] == _frame(**{field.key: value})
+
+
+@pytest.mark.parametrize("field", _RANGED_FIELDS, ids=lambda f: f.key)
+def test_out_of_range_frame_is_rejected(field):
+    for value in (field.lo - 1, field.hi + 1):
+        with pytest.raises(FrameError) as err:
+            INFO_DECODER.decode_frame(_frame(**{field.key: value}))
+        assert err.value.reason == REJECT_OUT_OF_RANGE
+    INFO_DECODER.decode_frame(_frame(**{field.key: field.hi}))
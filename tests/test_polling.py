@@ -0,0 +1,62 @@
+"""Poll scheduling against simulated time: answers, unsolicited frames, backoff and boost."""
+from __future__ import annotations
+
+from custom_components.teknix.polling import PollScheduler
+
+TICK = 5
+
+
+def _run(scheduler: PollScheduler, duration: float, answer_after: float | None = 1.0, frames=(), commands=()):
+    """Tick the scheduler for duration seconds; return the times polls were sent."""
+    sent = []
+    answer_at = None
+    frames = sorted(frames)
+    for now in range(0, int(duration), TICK):
+        while frames and frames[0] <= now:
+            scheduler.frame_received(frames.pop(0))
+        if answer_at is not None and answer_at <= now:
+            scheduler.frame_received(answer_at)
+            answer_at = None
+        if now in commands:
+            scheduler.command_sent(now)
+        if scheduler.due(now):
+            sent.append(now)
+            if answer_after is not None:
+                answer_at = now + answer_after
+    return sent
+
+
+def test_answers_keep_the_interval():
+    scheduler = PollScheduler(60, 900)
+    sent = _run(scheduler, 3600)
+    assert {b - a for a, b in zip(sent, sent[1:])} == {60}
+    assert scheduler.skipped_fresh == 0
+    assert scheduler.misses == 0
+
+
+def test_unsolicited_frame_defers_the_poll():
+    scheduler = PollScheduler(60, 900)
+    sent = _run(scheduler, 300, frames=[90])
+    # the frame at 90 s stands in for the poll due at 120 s
+    assert sent == [0, 60, 150, 210, 270]
+    assert scheduler.skipped_fresh == 1
+
+
+def test_fresh_skip_can_be_disabled():
+    scheduler = PollScheduler(180, 900, skip_fresh=False)
+    sent = _run(scheduler, 3600, frames=range(30, 3600, 60))
+    assert {b - a for a, b in zip(sent, sent[1:])} == {180}
+    assert scheduler.skipped_fresh == 0
+
+
+def test_unanswered_polls_back_off():
+    scheduler = PollScheduler(60, 900)
+    sent = _run(scheduler, 3600, answer_after=None)
+    assert [b - a for a, b in zip(sent, sent[1:])][:5] == [60, 120, 240, 480, 900]
+    assert scheduler.misses > 0
+
+
+def test_boost_after_command():
+    scheduler = PollScheduler(60, 900, boost_interval=10, boost_duration=60)
+    sent = _run(scheduler, 300, commands={120})
+    assert [t for t in sent if 120 <= t < 180] == [120, 130, 140, 150, 160, 170]
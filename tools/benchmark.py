@@ -0,0 +1,206 @@
+"""Multi-heater load benchmark for TeknixHub.
+
+Starts N simulated heaters (tools/teknix_sim.py) on an in-process MQTT
+stand-in, one TeknixHub per heater on a real (bare) HomeAssistant core,
+and reports per-frame hub latency, event-loop lag, entity state writes,
+suppressed writes and Store saves. Requires homeassistant to be installed.
+
+    python tools/benchmark.py --heaters 50 --frame-interval 2 --duration 60
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+# importing mqtt on its own trips a websocket_api <-> http import cycle
+import homeassistant.components.persistent_notification  # noqa: E402,F401
+from homeassistant.components import mqtt  # noqa: E402
+
+from custom_components.teknix import TeknixHub  # noqa: E402
+from custom_components.teknix.commands import build_power_command  # noqa: E402
+from custom_components.teknix.const import DOMAIN, POWER_STEP_SLOT  # noqa: E402
+from custom_components.teknix.number import POWER_STEPS, TARGETS  # noqa: E402
+from custom_components.teknix.sensor import SENSOR_DESCS  # noqa: E402
+from custom_components.teknix.switch import SWITCH_DESCS  # noqa: E402
+from teknix_sim import EsproSimulator, LocalBroker  # noqa: E402
+
+# State keys the entity platforms subscribe to
+ENTITY_KEYS = (
+    [d.key for d in SENSOR_DESCS]
+    + ["current_consumption"]
+    + [d.key for d in SWITCH_DESCS]
+    + [cfg["key"] for cfg in TARGETS + POWER_STEPS]
+)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.frame_latency: list[float] = []
+        self.loop_lag: list[float] = []
+        self.round_trip: list[float] = []
+        self.state_writes = 0
+        self.store_saves = 0
+        self.command_errors = 0
+
+
+def _instrument(hub: TeknixHub, stats: Stats) -> None:
+    handler = hub._mqtt_message_received
+    data_to_save = hub._data_to_save
+
+    def timed_handler(msg) -> None:
+        start = time.perf_counter()
+        handler(msg)
+        stats.frame_latency.append(time.perf_counter() - start)
+
+    def counted_save() -> dict:
+        stats.store_saves += 1
+        return data_to_save()
+
+    def write() -> None:
+        stats.state_writes += 1
+
+    # instance attributes shadow the methods the hub hands to the router and Store
+    hub._mqtt_message_received = timed_handler
+    hub._data_to_save = counted_save
+    for key in ENTITY_KEYS:
+        hub.async_subscribe(key, write)
+
+
+async def _measure_loop_lag(stats: Stats, interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.loop_lag.append(time.perf_counter() - start - interval)
+
+
+async def _send_commands(hubs: list[TeknixHub], interval: float, stats: Stats) -> None:
+    rng = random.Random(0)
+    while True:
+        await asyncio.sleep(interval)
+        hub = rng.choice(hubs)
+        house, tank = rng.randint(1, hub.step_max), rng.randint(1, hub.step_max)
+        start = time.perf_counter()
+        try:
+            await hub.async_request(POWER_STEP_SLOT, build_power_command(house, tank), {
+                "house_heating_step": house,
+                "tank_heating_step": tank,
+            })
+        except Exception:
+            stats.command_errors += 1
+        else:
+            stats.round_trip.append(time.perf_counter() - start)
+
+
+def _make_hass(config_dir: str) -> HomeAssistant:
+    try:
+        return HomeAssistant(config_dir)
+    except TypeError:  # cores before 2024.2 take no arguments
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+        return hass
+
+
+async def run(args: argparse.Namespace) -> Stats:
+    stats = Stats()
+    broker = LocalBroker()
+
+    async def async_subscribe(hass, topic, msg_callback, qos=0, encoding="utf-8"):
+        return broker.subscribe(topic, msg_callback, encoding)
+
+    async def async_publish(hass, topic, payload, qos=0, retain=False, encoding="utf-8"):
+        broker.publish(topic, payload)
+
+    # the local broker never disconnects
+    def async_subscribe_connection_status(hass, connection_status_callback):
+        return lambda: None
+
+    with tempfile.TemporaryDirectory() as config_dir, \
+            patch.object(mqtt, "async_subscribe", async_subscribe), \
+            patch.object(mqtt, "async_publish", async_publish), \
+            patch.object(mqtt, "is_connected", lambda hass: True), \
+            patch.object(mqtt, "async_subscribe_connection_status", async_subscribe_connection_status):
+        hass = _make_hass(config_dir)
+        hass.data.setdefault(DOMAIN, {})
+
+        sims = []
+        hubs = []
+        for i in range(args.heaters):
+            serial = str(22110223150100000 + i)
+            sim = EsproSimulator(broker, serial, frame_interval=args.frame_interval, seed=i)
+            sim.start()
+            sims.append(sim)
+            hub = TeknixHub(hass, serial, "ESPRO 15", f"bench{i}")
+            hass.data[DOMAIN][hub.entry_id] = hub
+            _instrument(hub, stats)
+            hubs.append(hub)
+
+        tasks = [asyncio.get_running_loop().create_task(_measure_loop_lag(stats))]
+        for hub in hubs:
+            await hub.async_start()
+        if args.command_interval:
+            tasks.append(asyncio.get_running_loop().create_task(
+                _send_commands(hubs, args.command_interval, stats)
+            ))
+
+        await asyncio.sleep(args.duration)
+
+        for task in tasks:
+            task.cancel()
+        for hub in hubs:
+            await hub.async_stop()
+        for sim in sims:
+            sim.stop()
+        stats.suppressed_writes = sum(hub.suppressed_writes for hub in hubs)
+        stats.frames = sum(sim.frames for sim in sims)
+        stats.broker_messages = broker.published
+        await hass.async_stop(force=True)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heaters", type=int, default=10)
+    parser.add_argument("--frame-interval", type=float, default=5.0, help="seconds between unsolicited frames per heater")
+    parser.add_argument("--command-interval", type=float, default=0.0, help="seconds between step commands (0: none)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args))
+    us = 1e6
+    ms = 1e3
+    print(f"heaters:             {args.heaters}")
+    print(f"duration:            {args.duration:.0f} s")
+    print(f"frames published:    {stats.frames} ({stats.frames / args.duration:.1f}/s)")
+    print(f"broker messages:     {stats.broker_messages}")
+    print(f"hub frame latency:   p50 {_percentile(stats.frame_latency, 50) * us:.0f} us, "
+          f"p99 {_percentile(stats.frame_latency, 99) * us:.0f} us, "
+          f"mean {statistics.fmean(stats.frame_latency or [0]) * us:.0f} us")
+    print(f"event loop lag:      p50 {_percentile(stats.loop_lag, 50) * ms:.2f} ms, "
+          f"p99 {_percentile(stats.loop_lag, 99) * ms:.2f} ms, max {max(stats.loop_lag or [0]) * ms:.2f} ms")
+    print(f"state writes:        {stats.state_writes} (suppressed {stats.suppressed_writes})")
+    print(f"store saves:         {stats.store_saves}")
+    if args.command_interval:
+        print(f"command round trip:  p50 {_percentile(stats.round_trip, 50) * ms:.0f} ms, "
+              f"p99 {_percentile(stats.round_trip, 99) * ms:.0f} ms, errors {stats.command_errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Teknix ESPRO heater simulator.
+
+Behaves like the heater's Tasmota serial bridge: listens on
+cmnd/tasmota_<serial>/SerialSend, answers INFO with an INFO frame on
+tele/tasmota_<serial>/RESULT ({"SerialReceived": "I...Z"}), applies the
+T..Z commands built by custom_components/teknix/commands.py (decoded and
+checksum-verified by the integration's codec, so it needs homeassistant
+installed) and can publish unsolicited frames at a fixed rate.
+
+Runs against an in-process broker stand-in (LocalBroker, used by
+tools/benchmark.py) or a real MQTT broker via paho-mqtt:
+
+    python tools/teknix_sim.py --host localhost --count 5 --frame-interval 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.teknix.codec import decode_command  # noqa: E402
+from custom_components.teknix.fields import FIELDS_BY_KEY  # noqa: E402
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_LENGTH = 40
+
+# Frame positions, same as the info40 layout in custom_components/teknix/fields.py
+POWER = 0
+HOUSE_TARGET = 1
+TANK_TARGET = 8
+HOUSE_ACTIVE = 11
+TANK_ACTIVE = 12
+HOUSE_STEP = 18
+TANK_STEP = 19
+HOUSE_LOOP_TEMP = 38
+TANK_WATER_TEMP = 39
+
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT topic filter matching with + and # wildcards."""
+    f_parts = topic_filter.split("/")
+    t_parts = topic.split("/")
+    for i, part in enumerate(f_parts):
+        if part == "#":
+            return True
+        if i >= len(t_parts) or (part != "+" and part != t_parts[i]):
+            return False
+    return len(f_parts) == len(t_parts)
+
+
+@dataclass
+class Message:
+    """Subset of homeassistant.components.mqtt.ReceiveMessage used by the hub."""
+    topic: str
+    payload: Any
+    qos: int = 0
+    retain: bool = False
+
+
+class LocalBroker:
+    """In-process MQTT stand-in: synchronous fan-out on the event loop."""
+
+    def __init__(self) -> None:
+        self._subs: list[tuple[str, Callable[[Message], None], Optional[str]]] = []
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, topic_filter: str, callback: Callable[[Message], None], encoding: Optional[str] = "utf-8") -> Callable[[], None]:
+        sub = (topic_filter, callback, encoding)
+        self._subs.append(sub)
+        return lambda: self._subs.remove(sub)
+
+    def publish(self, topic: str, payload: Any) -> None:
+        self.published += 1
+        if isinstance(payload, str):
+            payload = payload.encode()
+        for topic_filter, callback, encoding in list(self._subs):
+            if topic_matches(topic_filter, topic):
+                self.delivered += 1
+                callback(Message(topic, payload.decode(encoding) if encoding else payload))
+
+
+class PahoBroker:
+    """Same interface as LocalBroker, backed by a real broker (needs paho-mqtt)."""
+
+    def __init__(self, host: str, port: int = 1883, username: Optional[str] = None, password: Optional[str] = None):
+        import paho.mqtt.client as paho
+
+        self._loop = asyncio.get_running_loop()
+        self._client = paho.Client()
+        if username:
+            self._client.username_pw_set(username, password)
+        self._subs: list[tuple[str, Callable[[Message], None]]] = []
+        self._client.on_message = self._on_message
+        self._client.connect(host, port)
+        self._client.loop_start()
+
+    def _on_message(self, _client, _userdata, msg) -> None:
+        for topic_filter, callback in list(self._subs):
+            if topic_matches(topic_filter, msg.topic):
+                self._loop.call_soon_threadsafe(callback, Message(msg.topic, msg.payload))
+
+    def subscribe(self, topic_filter: str, callback: Callable[[Message], None], encoding: Optional[str] = None) -> Callable[[], None]:
+        self._subs.append((topic_filter, callback))
+        self._client.subscribe(topic_filter)
+        return lambda: self._subs.remove((topic_filter, callback))
+
+    def publish(self, topic: str, payload: Any) -> None:
+        self._client.publish(topic, payload)
+
+    def close(self) -> None:
+        self._client.loop_stop()
+        self._client.disconnect()
+
+
+class EsproSimulator:
+    """One simulated heater."""
+
+    def __init__(
+        self,
+        broker,
+        serial: str,
+        *,
+        step_max: int = 6,
+        frame_interval: Optional[float] = None,
+        response_delay: float = 0.05,
+        seed: Optional[int] = None,
+    ):
+        self.broker = broker
+        self.serial = serial
+        self.step_max = step_max
+        self.frame_interval = frame_interval
+        self.response_delay = response_delay
+        self._random = random.Random(seed if seed is not None else serial)
+
+        self.values = [0] * FRAME_LENGTH
+        self.values[POWER] = 1
+        self.values[HOUSE_TARGET] = 60
+        self.values[TANK_TARGET] = 50
+        self.values[HOUSE_ACTIVE] = 1
+        self.values[HOUSE_STEP] = 3
+        self.values[TANK_STEP] = 2
+        self.values[HOUSE_LOOP_TEMP] = 400
+        self.values[TANK_WATER_TEMP] = 380
+
+        self.commands = 0
+        self.frames = 0
+        self._unsub: Optional[Callable[[], None]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def result_topic(self) -> str:
+        return f"tele/tasmota_{self.serial}/RESULT"
+
+    def start(self) -> None:
+        self._unsub = self.broker.subscribe(
+            f"cmnd/tasmota_{self.serial}/SerialSend", self._on_command, encoding="utf-8"
+        )
+        self.broker.publish(f"tele/tasmota_{self.serial}/LWT", "Online")
+        if self.frame_interval:
+            self._task = asyncio.get_running_loop().create_task(self._publish_loop())
+
+    def stop(self) -> None:
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def frame(self) -> str:
+        return "I" + "&".join(map(str, self.values)) + "Z"
+
+    def publish_frame(self) -> None:
+        self._tick()
+        self.frames += 1
+        self.broker.publish(self.result_topic, json.dumps({"SerialReceived": self.frame()}))
+
+    def apply(self, cmd: str) -> bool:
+        """Apply a T..Z command; return False if it is unknown or its checksum is wrong."""
+        values = decode_command(cmd)
+        if values is None:
+            return False
+        for key, value in values.items():
+            if key in ("house_heating_step", "tank_heating_step"):
+                value = min(value, self.step_max)
+            self.values[FIELDS_BY_KEY[key].index] = int(value)
+        return True
+
+    def _on_command(self, msg: Message) -> None:
+        cmd = msg.payload.decode() if isinstance(msg.payload, bytes) else msg.payload
+        self.commands += 1
+        if cmd == "INFO":
+            asyncio.get_running_loop().call_later(self.response_delay, self.publish_frame)
+        elif cmd != "PO1800NG" and not self.apply(cmd):
+            _LOGGER.warning("Simulator %s: unknown command %s", self.serial, cmd)
+
+    def _tick(self) -> None:
+        """Move measured temperatures a little, like a real loop would."""
+        v = self.values
+        heating = v[POWER] and v[HOUSE_ACTIVE] and v[HOUSE_LOOP_TEMP] < v[HOUSE_TARGET] * 10
+        v[HOUSE_LOOP_TEMP] += v[HOUSE_STEP] if heating else -self._random.randint(0, 2)
+        v[HOUSE_LOOP_TEMP] += self._random.randint(-1, 1)
+        heating = v[POWER] and v[TANK_ACTIVE] and v[TANK_WATER_TEMP] < v[TANK_TARGET] * 10
+        v[TANK_WATER_TEMP] += v[TANK_STEP] if heating else -self._random.randint(0, 1)
+
+    async def _publish_loop(self) -> None:
+        # start at a random phase so simulated heaters do not publish in lockstep
+        await asyncio.sleep(self._random.uniform(0, self.frame_interval))
+        while True:
+            self.publish_frame()
+            await asyncio.sleep(self.frame_interval)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--count", type=int, default=1, help="number of heaters")
+    parser.add_argument("--serial-base", type=int, default=22110223150100000)
+    parser.add_argument("--frame-interval", type=float, default=None, help="seconds between unsolicited frames")
+    args = parser.parse_args()
+
+    broker = PahoBroker(args.host, args.port, args.username, args.password)
+    sims = [
+        EsproSimulator(broker, str(args.serial_base + i), frame_interval=args.frame_interval)
+        for i in range(args.count)
+    ]
+    for sim in sims:
+        sim.start()
+    _LOGGER.warning("Simulating %d heaters: %s", len(sims), ", ".join(s.serial for s in sims))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for sim in sims:
+            sim.stop()
+        broker.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())